@@ -1,5 +1,28 @@
+import uuid
+
 from django.db import models
 
 
 class TestModel(models.Model):
     name = models.CharField(max_length=10)
+
+
+class Brand(models.Model):
+    name = models.CharField(max_length=10)
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=10)
+
+
+class Product(models.Model):
+    code = models.CharField(max_length=10, unique=True)
+    name = models.CharField(max_length=10)
+    description = models.TextField(blank=True)
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
+    tags = models.ManyToManyField(Tag)
+
+
+class Voucher(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    code = models.CharField(max_length=10)
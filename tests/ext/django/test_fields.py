@@ -1,10 +1,38 @@
+import concurrent.futures
+import copy
+import hashlib
+import json
+import math
+import pickle
+import tracemalloc
+import unittest
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (
+    SimpleUploadedFile, TemporaryUploadedFile)
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
+from django.http import JsonResponse, QueryDict
+from django.test import RequestFactory
 from django.test import TestCase as DjangoTestCase
+from django.test import override_settings
+from django.utils.datastructures import MultiValueDict
+from django.views import View
 
-from valedictory.exceptions import NoData, ValidationException
-from valedictory.ext.django import ForeignKeyField, URLField
+from valedictory import Validator, scope
+from valedictory.exceptions import (
+    InvalidDataException, NoData, ValidationException)
+from valedictory.ext.django import (
+    ForeignKeyField, FormData, LookupCache, UploadedFileField, URLField,
+    ValidateRequestMixin, assert_max_queries, bulk_import, profile_queries,
+    validate_request)
+from valedictory.fields import (
+    IntegerField, ListField, NestedValidator, StringField)
 
 from ...utils import ValidatorTestCase
-from .models import TestModel
+from .models import Brand, Product, Tag, TestModel, Voucher
 
 
 class TestURLField(ValidatorTestCase):
@@ -37,6 +65,57 @@ class TestURLField(ValidatorTestCase):
         with self.assertRaises(ValidationException):
             self.field.clean(True)
 
+    def test_pre_screen(self):
+        # The pre-screen must never reject a URL that URLValidator accepts
+        urls = [
+            "http://example.com", "HTTPS://EXAMPLE.COM/", "ftp://example.com:21/file",
+            "http://user@example.com", "http://user:@example.com", "http://u:p@example.com:80",
+            "http://[::1]/", "http://[::1]:8080/", "http://[::1", "http://1.2.3.4/",
+            "http://localhost", "http://localhost./", "http://bücher.ch/",
+            "http://xn--bcher-kva.ch",
+            "http://example.com?query", "http://example.com#frag", "http://example.com/a b",
+            "http://exa mple.com", "http://example.com\n", "http://:80/", "http://@example.com",
+            "http://user@/path", "http://", "http:///path", "mailto:someone@example.com",
+            "example.com", "://example.com", "javascript://example.com", "",
+            "http://" + "a" * 2048 + ".com",
+        ]
+        for url in urls:
+            try:
+                self.field.validator(url)
+            except ValidationError:
+                continue
+            self.assertTrue(self.field.is_possible_url(url), url)
+
+        for url in ["example.com", "mailto:someone@example.com", "http://exa mple.com",
+                    "http://:80/", "http://user@/path", "http://" + "a" * 2048 + ".com"]:
+            self.assertFalse(self.field.is_possible_url(url), url)
+
+    def test_pre_screen_skips_validator(self):
+        field = URLField()
+        with mock.patch.object(field, 'validator') as validator:
+            validator.max_length = 2048
+            validator.schemes = ['http', 'https']
+            with self.assertRaises(ValidationException):
+                field.clean("Definitely not a URL")
+        validator.assert_not_called()
+
+    def test_cache(self):
+        cache = LookupCache(max_size=2)
+        field = URLField(cache=cache)
+        self.assertIs(copy.deepcopy(field).cache, cache)
+
+        validator = mock.Mock(
+            wraps=field.validator, max_length=2048, schemes=field.validator.schemes)
+        with mock.patch.object(field, 'validator', validator):
+            for i in range(3):
+                field.clean("http://example.com/")
+            with self.assertRaises(ValidationException):
+                field.clean("http://example.com:nope/")
+            with self.assertRaises(ValidationException):
+                field.clean("http://example.com:nope/")
+        self.assertEqual(validator.call_count, 3)
+        self.assertEqual(len(cache), 1)
+
 
 class TestForeignKeyField(ValidatorTestCase, DjangoTestCase):
 
@@ -80,3 +159,1061 @@ class TestForeignKeyField(ValidatorTestCase, DjangoTestCase):
             field.clean("foo")
         error = cm.exception
         self.assertEqual(error.msg, field.error_messages['multiple'])
+
+    def test_invalid_key_for_model_field(self):
+        field = ForeignKeyField(Voucher.objects.all(), key_type=str)
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValidationException) as cm:
+                field.clean('not-a-uuid')
+        self.assertEqual(cm.exception.code, 'missing')
+
+        with self.assertRaises(InvalidDataException) as cm:
+            ListField(field).clean(['not-a-uuid'])
+        self.assertEqual(cm.exception, InvalidDataException({
+            0: [ValidationException("", 'missing')]}))
+
+    def test_keys_prepared_the_same(self):
+        field = ForeignKeyField(Voucher.objects.all(), key_type=str)
+        voucher = Voucher.objects.create(code="foo")
+        key = str(voucher.pk)
+
+        # Both spellings of the UUID are found by the one lookup,
+        # whether they are cleaned by themselves or in a list
+        validator = Validator(fields={
+            'many': ListField(field),
+            'one': field,
+        })
+        with self.assertNumQueries(1):
+            cleaned = validator.clean({'many': [key.upper(), key], 'one': key.upper()})
+        self.assertEqual(cleaned, {'many': [voucher, voucher], 'one': voucher})
+
+        scope.start()
+        self.addCleanup(scope.finish)
+        with self.assertNumQueries(1):
+            self.assertEqual([voucher], field.clean_many([key]))
+            self.assertEqual(voucher, field.clean(key.upper()))
+
+
+class TestForeignKeyFieldList(ValidatorTestCase, DjangoTestCase):
+
+    def test_one_query(self):
+        field = ListField(ForeignKeyField(TestModel.objects.all()))
+        objects = [TestModel.objects.create(name="foo{}".format(i)) for i in range(20)]
+        keys = [obj.pk for obj in reversed(objects)] + [objects[0].pk]
+
+        with self.assertNumQueries(1):
+            cleaned = field.clean(keys)
+        self.assertEqual(cleaned, list(reversed(objects)) + [objects[0]])
+
+    def test_many_queries(self):
+        # SQLite only allows so many parameters in a query
+        field = ListField(ForeignKeyField(TestModel.objects.all()))
+        objects = TestModel.objects.bulk_create(
+            TestModel(name="foo{}".format(i)) for i in range(1500))
+        objects = list(TestModel.objects.order_by('pk'))
+        batch_size = connection.features.max_query_params or len(objects)
+
+        with self.assertNumQueries(math.ceil(len(objects) / batch_size)):
+            cleaned = field.clean([obj.pk for obj in objects])
+        self.assertEqual(cleaned, objects)
+
+    def test_errors(self):
+        field = ListField(ForeignKeyField(TestModel.objects.all()))
+        foo = TestModel.objects.create(name="foo")
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(InvalidDataException) as cm:
+                field.clean([foo.pk, 1000, str(foo.pk), foo.pk])
+        self.assertEqual(cm.exception, InvalidDataException({
+            1: [ValidationException("", 'missing')],
+            2: [ValidationException("", 'invalid_type')],
+        }))
+
+    def test_to_field_clash(self):
+        field = ListField(ForeignKeyField(TestModel.objects.all(), field="name",
+                                          key_type=str))
+        bar = TestModel.objects.create(name="bar")
+        TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="foo")
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(InvalidDataException) as cm:
+                field.clean(["bar", "foo", "baz"])
+        self.assertEqual(cm.exception, InvalidDataException({
+            1: [ValidationException("", 'multiple')],
+            2: [ValidationException("", 'missing')],
+        }))
+
+        self.assertEqual([bar, bar], field.clean(["bar", "bar"]))
+
+
+class InlineExecutor(concurrent.futures.Executor):
+    """
+    Runs each task straight away, in the current thread,
+    so that the tasks use the test database connection.
+    """
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as err:
+            future.set_exception(err)
+        return future
+
+
+class TestForeignKeyFieldExecutor(ValidatorTestCase, DjangoTestCase):
+
+    def test_one_query(self):
+        field = ListField(ForeignKeyField(TestModel.objects.all()), executor=InlineExecutor())
+        objects = [TestModel.objects.create(name="foo{}".format(i)) for i in range(5)]
+
+        with self.assertNumQueries(1):
+            cleaned = field.clean([obj.pk for obj in objects])
+        self.assertEqual(cleaned, objects)
+
+    def test_nested_shares_scope(self):
+        validator = Validator(fields={'items': ListField(NestedValidator(Validator(fields={
+            'object': ForeignKeyField(TestModel.objects.all()),
+        })), executor=InlineExecutor())})
+        foo = TestModel.objects.create(name="foo")
+
+        with self.assertNumQueries(1):
+            cleaned = validator.clean({'items': [{'object': foo.pk}] * 8})
+        self.assertEqual(cleaned, {'items': [{'object': foo}] * 8})
+
+    def test_calling_thread(self):
+        # The lookups use the connection of the calling thread,
+        # so they see rows made in its transaction
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        foo = TestModel.objects.create(name="foo")
+        validator = Validator(fields={'items': ListField(NestedValidator(Validator(fields={
+            'object': ForeignKeyField(TestModel.objects.all()),
+        })), executor=executor)})
+
+        with mock.patch.object(executor, 'submit') as submit:
+            with self.assertNumQueries(1):
+                cleaned = validator.clean({'items': [{'object': foo.pk}] * 4})
+        submit.assert_not_called()
+        self.assertEqual(cleaned, {'items': [{'object': foo}] * 4})
+
+
+class TestForeignKeyFieldCaching(ValidatorTestCase, DjangoTestCase):
+
+    def make_order_validator(self, **kwargs):
+        return Validator(fields={
+            'product': ForeignKeyField(TestModel.objects.all(), **kwargs),
+            'items': ListField(NestedValidator(Validator(fields={
+                'product': ForeignKeyField(TestModel.objects.all(), **kwargs),
+                'quantity': IntegerField(),
+            }))),
+        })
+
+    def test_identity_map(self):
+        validator = self.make_order_validator()
+        foo = TestModel.objects.create(name="foo")
+        bar = TestModel.objects.create(name="bar")
+        data = {'product': foo.pk, 'items': [
+            {'product': foo.pk, 'quantity': 1},
+            {'product': bar.pk, 'quantity': 2},
+            {'product': foo.pk, 'quantity': 3},
+            {'product': bar.pk, 'quantity': 4},
+        ]}
+
+        # One query for the top level field, and one for each distinct
+        # product in the nested items
+        with self.assertNumQueries(3):
+            cleaned = validator.clean(data)
+        self.assertEqual([foo, bar, foo, bar], [item['product'] for item in cleaned['items']])
+
+        # Nothing is kept between calls to clean
+        with self.assertNumQueries(3):
+            validator.clean(data)
+
+    def test_identity_map_list(self):
+        field = ForeignKeyField(TestModel.objects.all())
+        validator = Validator(fields={'one': field, 'many': ListField(field)})
+        foo = TestModel.objects.create(name="foo")
+        bar = TestModel.objects.create(name="bar")
+
+        # foo is found by the first field, and reused in the list
+        with self.assertNumQueries(2):
+            cleaned = validator.clean({'one': foo.pk, 'many': [foo.pk, bar.pk]})
+        self.assertEqual(cleaned, {'one': foo, 'many': [foo, bar]})
+
+        with self.assertNumQueries(1):
+            cleaned = validator.clean({'one': foo.pk, 'many': [foo.pk, foo.pk]})
+        self.assertEqual(cleaned, {'one': foo, 'many': [foo, foo]})
+
+        # Missing objects are remembered too
+        with self.assertNumQueries(1):
+            with self.assertRaises(InvalidDataException):
+                validator.clean({'one': 1000, 'many': [1000, 1000]})
+
+    def test_lookup_cache(self):
+        cache = LookupCache()
+        validator = self.make_order_validator(cache=cache)
+        foo = TestModel.objects.create(name="foo")
+        data = {'product': foo.pk, 'items': [{'product': foo.pk, 'quantity': 1}]}
+
+        # The nested field finds foo in the cache
+        with self.assertNumQueries(1):
+            validator.clean(data)
+        with self.assertNumQueries(0):
+            self.assertEqual(foo, validator.clean(data)['product'])
+        self.assertEqual(cache.stats, {'hits': 3, 'misses': 1, 'size': 1})
+
+        cache.invalidate(('pk', foo.pk))
+        with self.assertNumQueries(1):
+            validator.clean(data)
+
+    def test_lookup_cache_missing(self):
+        cache = LookupCache()
+        field = ForeignKeyField(TestModel.objects.all(), cache=cache)
+        with self.assertRaises(ValidationException):
+            field.clean(1000)
+        self.assertEqual(len(cache), 0)
+
+    def test_lookup_cache_copy(self):
+        cache = LookupCache()
+        field = ForeignKeyField(TestModel.objects.all(), cache=cache)
+        self.assertIs(copy.deepcopy(field).cache, cache)
+
+
+class TestLookupCache(ValidatorTestCase):
+
+    def test_lru(self):
+        cache = LookupCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual(cache.stats, {'hits': 3, 'misses': 1, 'size': 2})
+
+    def test_ttl(self):
+        cache = LookupCache(ttl=10)
+        with mock.patch('time.monotonic', return_value=100):
+            cache.set('a', 1)
+        with mock.patch('time.monotonic', return_value=109):
+            self.assertEqual(1, cache.get('a'))
+        with mock.patch('time.monotonic', return_value=110):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = LookupCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1, 'size': 0})
+
+
+class TestForeignKeyFieldQuerysetOptions(ValidatorTestCase, DjangoTestCase):
+
+    def setUp(self):
+        self.brand = Brand.objects.create(name="brand")
+        self.tag = Tag.objects.create(name="tag")
+        self.products = [
+            Product.objects.create(code="p{}".format(i), name="product", brand=self.brand)
+            for i in range(3)]
+        for product in self.products:
+            product.tags.add(self.tag)
+
+    def test_select_related(self):
+        field = ForeignKeyField(Product.objects.all(), select_related=['brand'])
+        with self.assertNumQueries(1):
+            product = field.clean(self.products[0].pk)
+            self.assertEqual(product.brand.name, "brand")
+
+        with self.assertNumQueries(1):
+            products = ListField(field).clean([p.pk for p in self.products])
+            self.assertEqual([p.brand.name for p in products], ["brand"] * 3)
+
+    def test_prefetch_related(self):
+        field = ForeignKeyField(Product.objects.all(), prefetch_related=['tags'])
+        with self.assertNumQueries(2):
+            product = field.clean(self.products[0].pk)
+            self.assertEqual(list(product.tags.all()), [self.tag])
+
+        with self.assertNumQueries(2):
+            products = ListField(field).clean([p.pk for p in self.products])
+            self.assertEqual([list(p.tags.all()) for p in products], [[self.tag]] * 3)
+
+    def test_only(self):
+        field = ForeignKeyField(
+            Product.objects.all(), field='code', key_type=str, only=['name'])
+        with self.assertNumQueries(1):
+            product = field.clean("p0")
+            self.assertEqual(product.name, "product")
+            self.assertEqual(product.code, "p0")
+        self.assertEqual(
+            product.get_deferred_fields(), {'description', 'brand_id'})
+
+        with self.assertNumQueries(1):
+            products = ListField(field).clean(["p2", "p1"])
+        self.assertEqual(products, [self.products[2], self.products[1]])
+        self.assertEqual(
+            products[0].get_deferred_fields(), {'description', 'brand_id'})
+
+    def test_only_pk(self):
+        field = ForeignKeyField(Product.objects.all(), only=['name'])
+        with self.assertNumQueries(1):
+            products = ListField(field).clean([p.pk for p in self.products])
+        self.assertEqual(products, self.products)
+
+    def test_defer(self):
+        field = ForeignKeyField(
+            Product.objects.all(), field='code', key_type=str, defer=['description', 'code'])
+        with self.assertNumQueries(1):
+            products = ListField(field).clean(["p2", "p1"])
+        self.assertEqual(products, [self.products[2], self.products[1]])
+        self.assertEqual(products[0].get_deferred_fields(), {'description'})
+
+
+class TestForeignKeyFieldKeysOnly(ValidatorTestCase, DjangoTestCase):
+
+    def test_clean(self):
+        field = ForeignKeyField(TestModel.objects.all(), return_instance=False)
+        foo = TestModel.objects.create(name="foo")
+        with self.assertNumQueries(1):
+            self.assertEqual(foo.pk, field.clean(foo.pk))
+        with self.assertRaises(ValidationException) as cm:
+            field.clean(1000)
+        self.assertEqual(cm.exception.code, 'missing')
+
+    def test_to_field_clash(self):
+        field = ForeignKeyField(TestModel.objects.all(), field="name", key_type=str,
+                                return_instance=False)
+        TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="bar")
+
+        self.assertEqual("bar", field.clean("bar"))
+        with self.assertRaises(ValidationException) as cm:
+            field.clean("foo")
+        self.assertEqual(cm.exception.code, 'multiple')
+
+    def test_list(self):
+        field = ListField(ForeignKeyField(TestModel.objects.all(), return_instance=False))
+        objects = [TestModel.objects.create(name="foo{}".format(i)) for i in range(5)]
+        keys = [obj.pk for obj in reversed(objects)]
+
+        with self.assertNumQueries(1):
+            self.assertEqual(keys, field.clean(keys))
+
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean(keys + [1000])
+        self.assertEqual(cm.exception, InvalidDataException({
+            5: [ValidationException("", 'missing')],
+        }))
+
+    def test_list_to_field_clash(self):
+        field = ListField(ForeignKeyField(
+            TestModel.objects.all(), field="name", key_type=str, return_instance=False))
+        TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="bar")
+
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean(["bar", "foo"])
+        self.assertEqual(cm.exception, InvalidDataException({
+            1: [ValidationException("", 'multiple')],
+        }))
+
+
+class TestForeignKeyFieldCopy(ValidatorTestCase, DjangoTestCase):
+
+    def test_model(self):
+        field = ForeignKeyField(TestModel)
+        foo = TestModel.objects.create(name="foo")
+        self.assertEqual(foo, field.clean(foo.pk))
+
+    def test_shared_queryset(self):
+        queryset = TestModel.objects.all()
+        field = ForeignKeyField(queryset)
+        copied = copy.deepcopy(field)
+        self.assertIs(copied.queryset, queryset)
+
+        # Lookups do not use or fill the result cache of the shared queryset
+        foo = TestModel.objects.create(name="foo")
+        list(queryset)
+        bar = TestModel.objects.create(name="bar")
+        self.assertEqual(bar, copied.clean(bar.pk))
+        self.assertEqual([foo, bar], ListField(copied).clean([foo.pk, bar.pk]))
+        self.assertEqual([foo], list(queryset))
+
+    def test_many_validators(self):
+        """
+        Making validators should not copy the queryset,
+        no matter how large the table or its result cache is.
+        """
+        TestModel.objects.bulk_create(
+            TestModel(name="foo{}".format(i)) for i in range(1000))
+        queryset = TestModel.objects.all()
+        self.assertEqual(len(queryset), 1000)
+
+        class FKValidator(Validator):
+            one = ForeignKeyField(queryset)
+            many = ListField(ForeignKeyField(queryset))
+
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with self.assertNumQueries(0):
+            validators = [FKValidator() for i in range(1000)]
+        size, peak = tracemalloc.get_traced_memory()
+
+        self.assertLess(peak, 10 * 1024 * 1024)
+        self.assertIs(validators[-1].fields['one'].queryset, queryset)
+
+
+class TestForeignKeyFieldPickle(ValidatorTestCase, DjangoTestCase):
+
+    def test_pickle(self):
+        foo = TestModel.objects.create(name="foo")
+        TestModel.objects.create(name="bar")
+        cache = LookupCache()
+        field = ForeignKeyField(
+            TestModel.objects.filter(name="foo"), cache=cache, using='default')
+        field.clean(foo.pk)
+        self.assertEqual(len(cache), 1)
+
+        # Pickling does not evaluate the queryset
+        with self.assertNumQueries(0):
+            data = pickle.dumps(field)
+        unpickled = pickle.loads(data)
+
+        self.assertIs(unpickled.queryset.model, TestModel)
+        self.assertEqual(unpickled.queryset.db, 'default')
+        self.assertEqual(len(unpickled.cache), 0)
+        self.assertEqual(unpickled.cache.max_size, cache.max_size)
+        self.assertEqual(foo, unpickled.clean(foo.pk))
+        with self.assertRaises(ValidationException):
+            unpickled.clean(foo.pk + 1)
+
+    def test_pickle_queryset_options(self):
+        brand = Brand.objects.create(name="brand")
+        product = Product.objects.create(code="P1", name="Product", brand=brand)
+        product.tags.add(Tag.objects.create(name="tag"))
+
+        queryset = Product.objects.prefetch_related('tags').using('default')
+        queryset._hints = {'instance': brand}
+        field = ForeignKeyField(queryset)
+        with self.assertNumQueries(0):
+            unpickled = pickle.loads(pickle.dumps(field))
+        self.assertIsNone(queryset._result_cache)
+
+        self.assertEqual(unpickled.queryset._prefetch_related_lookups, ('tags',))
+        self.assertEqual(unpickled.queryset._hints, {'instance': brand})
+        self.assertIsNone(unpickled.queryset._result_cache)
+
+        # One query for the product, and one for its tags
+        with self.assertNumQueries(2):
+            cleaned = unpickled.clean(product.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(["tag"], [tag.name for tag in cleaned.tags.all()])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return 'replica'
+
+
+class TestForeignKeyFieldDatabases(ValidatorTestCase, DjangoTestCase):
+    databases = {'default', 'replica'}
+    multi_db = True
+
+    def setUp(self):
+        self.primary = TestModel.objects.using('default').create(name="primary")
+        self.replica = TestModel.objects.using('replica').create(name="replica")
+
+    def test_default(self):
+        field = ForeignKeyField(TestModel.objects.all(), field='name', key_type=str)
+        self.assertEqual(self.primary, field.clean("primary"))
+        with self.assertRaises(ValidationException):
+            field.clean("replica")
+
+    def test_using(self):
+        field = ForeignKeyField(
+            TestModel.objects.all(), field='name', key_type=str, using='replica')
+        with self.assertNumQueries(1, using='replica'):
+            self.assertEqual(self.replica, field.clean("replica"))
+        with self.assertRaises(ValidationException):
+            field.clean("primary")
+
+        with self.assertNumQueries(0, using='default'):
+            with self.assertNumQueries(1, using='replica'):
+                self.assertEqual([self.replica], ListField(field).clean(["replica"]))
+
+    def test_using_keys_only(self):
+        field = ForeignKeyField(
+            TestModel.objects.all(), field='name', key_type=str,
+            using='replica', return_instance=False)
+        self.assertEqual("replica", field.clean("replica"))
+        self.assertEqual(["replica"], ListField(field).clean(["replica"]))
+        with self.assertRaises(ValidationException):
+            field.clean("primary")
+
+    def test_router(self):
+        field = ForeignKeyField(TestModel.objects.all(), field='name', key_type=str)
+        with override_settings(DATABASE_ROUTERS=[ReplicaRouter()]):
+            self.assertEqual(self.replica, field.clean("replica"))
+            self.assertEqual([self.replica], ListField(field).clean(["replica"]))
+
+
+class TestForeignKeyFieldAsync(ValidatorTestCase, DjangoTestCase):
+
+    def setUp(self):
+        self.foo = TestModel.objects.create(name="foo")
+        self.bar = TestModel.objects.create(name="bar")
+
+    def aclean(self, validator, data):
+        return async_to_sync(validator.aclean)(data)
+
+    def test_aclean(self):
+        field = ForeignKeyField(TestModel.objects.all())
+        validator = Validator(fields={'one': field, 'many': ListField(field)})
+
+        with self.assertNumQueries(2):
+            cleaned = self.aclean(validator, {
+                'one': self.foo.pk, 'many': [self.foo.pk, self.bar.pk, self.bar.pk]})
+        self.assertEqual(cleaned, {'one': self.foo, 'many': [self.foo, self.bar, self.bar]})
+
+    def test_aclean_errors(self):
+        validator = Validator(fields={
+            'one': ForeignKeyField(TestModel.objects.all()),
+            'many': ListField(ForeignKeyField(TestModel.objects.all())),
+        })
+        with self.assertRaises(InvalidDataException) as cm:
+            self.aclean(validator, {'one': 1000, 'many': [self.foo.pk, 1000, 'nope']})
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('one',), "Object does not exist"),
+            (('many', 1), "Object does not exist"),
+            (('many', 2), "Expected a value of type 'foreign key'"),
+        })
+
+    def test_aclean_nested(self):
+        field = ForeignKeyField(TestModel.objects.all(), field='name', key_type=str)
+        validator = Validator(fields={
+            'product': field,
+            'items': ListField(NestedValidator(Validator(fields={'product': field}))),
+        })
+        data = {'product': 'foo', 'items': [
+            {'product': 'foo'}, {'product': 'bar'}, {'product': 'bar'}]}
+
+        # The nested validators share the identity map of the outer one
+        with self.assertNumQueries(2):
+            cleaned = self.aclean(validator, data)
+        self.assertEqual(
+            [self.foo, self.bar, self.bar],
+            [item['product'] for item in cleaned['items']])
+
+    def test_aclean_cache(self):
+        cache = LookupCache()
+        field = ForeignKeyField(TestModel.objects.all(), cache=cache)
+        validator = Validator(fields={'one': field})
+        with self.assertNumQueries(1):
+            self.aclean(validator, {'one': self.foo.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual({'one': self.foo}, self.aclean(validator, {'one': self.foo.pk}))
+
+    def test_aclean_keys_only(self):
+        field = ForeignKeyField(TestModel.objects.all(), return_instance=False)
+        validator = Validator(fields={'one': field, 'many': ListField(field)})
+        cleaned = self.aclean(validator, {'one': self.foo.pk, 'many': [self.bar.pk]})
+        self.assertEqual(cleaned, {'one': self.foo.pk, 'many': [self.bar.pk]})
+
+    @unittest.skipUnless(hasattr(QuerySet, '__aiter__'), "Needs Django 4.1")
+    def test_async_iteration(self):
+        # Evaluating a queryset synchronously in async code raises an error,
+        # so these lookups must use the async queryset API
+        field = ForeignKeyField(TestModel.objects.all())
+        validator = Validator(fields={'one': field, 'many': ListField(field)})
+        with mock.patch('valedictory.ext.django.sync_to_async', None):
+            cleaned = self.aclean(validator, {'one': self.foo.pk, 'many': [self.bar.pk]})
+        self.assertEqual(cleaned, {'one': self.foo, 'many': [self.bar]})
+
+    def test_overridden_clean(self):
+        # Subclasses that only override clean() are cleaned in a worker thread,
+        # as querying the database from the event loop raises an error
+        class CheckedForeignKeyField(ForeignKeyField):
+            def clean(self, value):
+                obj = super().clean(value)
+                TestModel.objects.filter(pk=obj.pk).exists()
+                return obj
+
+        class NameField(StringField):
+            def clean(self, data):
+                return TestModel.objects.get(name=super().clean(data))
+
+        class CheckedNestedValidator(NestedValidator):
+            def clean(self, data):
+                cleaned = super().clean(data)
+                TestModel.objects.filter(pk=cleaned['product'].pk).exists()
+                return cleaned
+
+        validator = Validator(fields={
+            'one': CheckedForeignKeyField(TestModel.objects.all()),
+            'many': ListField(CheckedForeignKeyField(TestModel.objects.all())),
+            'name': NameField(),
+            'names': ListField(NameField()),
+            'item': CheckedNestedValidator(Validator(fields={'product': NameField()})),
+        })
+        cleaned = self.aclean(validator, {
+            'one': self.foo.pk, 'many': [self.foo.pk, self.bar.pk],
+            'name': 'foo', 'names': ['foo', 'bar'], 'item': {'product': 'bar'},
+        })
+        self.assertEqual(cleaned, {
+            'one': self.foo, 'many': [self.foo, self.bar],
+            'name': self.foo, 'names': [self.foo, self.bar], 'item': {'product': self.bar},
+        })
+
+
+class OneQueryPerItemField(ForeignKeyField):
+    """
+    Looks up every item in a list separately, an N+1 query problem.
+    """
+    def clean_many(self, data):
+        return [self.clean(datum) for datum in data]
+
+
+class TestQueryProfile(ValidatorTestCase, DjangoTestCase):
+
+    def setUp(self):
+        self.products = [TestModel.objects.create(name=str(i)) for i in range(5)]
+        self.data = {
+            'product': self.products[0].pk,
+            'items': [{'product': product.pk} for product in self.products],
+            'tags': [product.pk for product in self.products],
+        }
+
+    def make_validator(self, field_class=ForeignKeyField):
+        return Validator(fields={
+            'product': ForeignKeyField(TestModel),
+            'items': ListField(NestedValidator(Validator(fields={
+                'product': ForeignKeyField(TestModel),
+            }))),
+            'tags': ListField(field_class(TestModel)),
+        })
+
+    def test_profile(self):
+        validator = self.make_validator()
+        profile = profile_queries(validator, self.data)
+
+        self.assertEqual(profile.count, 7)
+        self.assertEqual(profile.cleaned_data['tags'], self.products)
+        self.assertIsNone(profile.errors)
+        self.assertEqual([(path, count) for path, (count, time) in profile.by_path().items()], [
+            (('product',), 1),
+            (('items', 'product'), 5),
+            (('tags',), 1),
+        ])
+        self.assertGreater(profile.time, 0)
+        self.assertIn('items.product: 5 queries', str(profile))
+
+        # The validator is not changed
+        nested = validator.fields['items'].field.validator
+        self.assertIsInstance(nested.fields['product'], ForeignKeyField)
+
+    def test_shared_field(self):
+        # A field in two places is reported at each path,
+        # and still shares what it has found
+        field = ForeignKeyField(TestModel)
+        validator = Validator(fields={'one': field, 'many': ListField(field)})
+        foo, bar = self.products[:2]
+
+        profile = profile_queries(validator, {'one': foo.pk, 'many': [bar.pk]})
+        paths = [path for path, alias, sql, time in profile.queries]
+        self.assertEqual(paths, [('one',), ('many',)])
+
+        profile = profile_queries(validator, {'one': foo.pk, 'many': [foo.pk]})
+        paths = [path for path, alias, sql, time in profile.queries]
+        self.assertEqual(paths, [('one',)])
+
+    def test_errors(self):
+        profile = profile_queries(self.make_validator(), {'product': 1000})
+        self.assertEqual(profile.count, 1)
+        self.assertIsNone(profile.cleaned_data)
+        self.assertEqual(set(profile.errors.flatten()), {
+            (('product',), "Object does not exist"),
+            (('items',), "This field is required"),
+            (('tags',), "This field is required"),
+        })
+
+    def test_assert_max_queries(self):
+        profile = assert_max_queries(self.make_validator(), self.data, 7)
+        self.assertEqual(profile.count, 7)
+
+        with self.assertRaises(AssertionError) as cm:
+            assert_max_queries(self.make_validator(OneQueryPerItemField), self.data, 7)
+        self.assertIn('Expected at most 7 queries, but 11 queries', str(cm.exception))
+        self.assertIn('tags: 5 queries', str(cm.exception))
+
+
+class TestUploadedFileField(ValidatorTestCase):
+
+    png = b'\x89PNG\r\n\x1a\n' + b'x' * 1000
+
+    def make_file(self, content, content_type='image/png'):
+        return SimpleUploadedFile('file', content, content_type)
+
+    def test_file(self):
+        upload = self.make_file(self.png)
+        self.assertIs(UploadedFileField().clean(upload), upload)
+        with self.assertRaises(ValidationException):
+            UploadedFileField().clean('file.png')
+
+    def test_empty_signature(self):
+        # An empty signature matches any file, without reading it
+        field = UploadedFileField(
+            content_types=['text/plain'], signatures={'text/plain': [b'']})
+        upload = self.make_file(b'Hello', content_type='text/plain')
+        self.assertIs(field.clean(upload), upload)
+
+    def test_max_size(self):
+        field = UploadedFileField(max_size=len(self.png))
+        self.assertEqual(field.clean(self.make_file(self.png)).size, len(self.png))
+
+        with self.assertRaises(ValidationException) as cm:
+            field.clean(self.make_file(self.png + b'x'))
+        self.assertEqual(cm.exception.code, 'max_size')
+
+    def test_max_size_declared(self):
+        # Files declaring a size that is too large are not read at all
+        upload = self.make_file(self.png)
+        upload.size = 10 ** 9
+        field = UploadedFileField(max_size=1000, checksum='sha256')
+        with mock.patch.object(upload, 'chunks') as chunks:
+            with self.assertRaises(ValidationException) as cm:
+                field.clean(upload)
+        self.assertEqual(cm.exception.code, 'max_size')
+        chunks.assert_not_called()
+
+    def test_max_size_undeclared(self):
+        # Files without a declared size are counted while reading,
+        # stopping as soon as the file is too large
+        upload = TemporaryUploadedFile('file', 'image/png', None, None)
+        self.addCleanup(upload.close)
+        upload.write(self.png * 10)
+        field = UploadedFileField(max_size=len(self.png) * 2, chunk_size=len(self.png))
+        read = []
+
+        def chunks(chunk_size):
+            for chunk in TemporaryUploadedFile.chunks(upload, chunk_size):
+                read.append(chunk)
+                yield chunk
+
+        with mock.patch.object(upload, 'chunks', chunks):
+            with self.assertRaises(ValidationException) as cm:
+                field.clean(upload)
+        self.assertEqual(cm.exception.code, 'max_size')
+        self.assertEqual(len(read), 3)
+        self.assertEqual(upload.tell(), 0)
+
+    def test_content_types(self):
+        field = UploadedFileField(content_types=['image/png', 'text/plain'])
+        field.clean(self.make_file(self.png))
+        field.clean(self.make_file(b'Hello', 'text/plain'))
+
+        with self.assertRaises(ValidationException) as cm:
+            field.clean(self.make_file(b'%PDF-1.4', 'application/pdf'))
+        self.assertEqual(cm.exception.code, 'content_type')
+        self.assertEqual(cm.exception.msg, "Files of type application/pdf are not allowed")
+
+    def test_signature(self):
+        field = UploadedFileField(content_types=['image/png'])
+        with self.assertRaises(ValidationException) as cm:
+            field.clean(self.make_file(b'MZ' + self.png))
+        self.assertEqual(cm.exception.code, 'signature')
+
+        # The file is left at the start after being sniffed
+        upload = field.clean(self.make_file(self.png))
+        self.assertEqual(upload.read(), self.png)
+
+    def test_signature_small_chunks(self):
+        field = UploadedFileField(content_types=['image/png'], checksum='md5', chunk_size=3)
+        field.clean(self.make_file(self.png))
+        with self.assertRaises(ValidationException):
+            field.clean(self.make_file(b'\x89PNG' + self.png))
+
+    def test_checksum(self):
+        field = UploadedFileField(checksum='sha256', chunk_size=100)
+        upload = field.clean(self.make_file(self.png))
+        self.assertEqual(upload.checksum, hashlib.sha256(self.png).hexdigest())
+        self.assertEqual(upload.read(), self.png)
+
+    def test_unknown_checksum(self):
+        with self.assertRaises(ValueError):
+            UploadedFileField(checksum='nope')
+
+
+class ProductValidator(Validator):
+    code = StringField(max_length=10)
+    name = StringField(max_length=10)
+    brand = ForeignKeyField(Brand)
+
+
+class TestBulkImport(ValidatorTestCase, DjangoTestCase):
+
+    def setUp(self):
+        self.brands = [Brand.objects.create(name=str(i)) for i in range(3)]
+
+    def make_records(self, count):
+        return ({
+            'code': 'P{}'.format(i),
+            'name': 'Product',
+            'brand': self.brands[i % 3].pk,
+        } for i in range(count))
+
+    def test_import(self):
+        # Per chunk: one query for the brands, and one to insert
+        with self.assertNumQueries(4):
+            result = bulk_import(Product, ProductValidator(), self.make_records(10), chunk_size=5)
+        self.assertEqual(result.created, 10)
+        self.assertEqual(result.errors, {})
+        self.assertEqual(
+            [(product.code, product.brand_id) for product in Product.objects.order_by('pk')],
+            [('P{}'.format(i), self.brands[i % 3].pk) for i in range(10)])
+
+    def test_errors(self):
+        records = list(self.make_records(6))
+        records[1]['brand'] = 1000
+        records[4]['code'] = 'Far too long'
+        records[5]['brand'] = 'nope'
+        result = bulk_import(Product, ProductValidator(), records, chunk_size=4)
+
+        self.assertEqual(result.created, 3)
+        self.assertEqual(list(result.errors), [1, 4, 5])
+        self.assertEqual(set(result.errors[1].flatten()), {(('brand',), "Object does not exist")})
+        self.assertEqual(
+            sorted(Product.objects.values_list('code', flat=True)), ['P0', 'P2', 'P3'])
+
+    def test_batch_size(self):
+        with self.assertNumQueries(1 + 4):
+            bulk_import(Product, ProductValidator(), self.make_records(10), batch_size=3)
+        self.assertEqual(Product.objects.count(), 10)
+
+    def test_atomic(self):
+        records = list(self.make_records(4))
+        records[3]['code'] = 'P0'
+        with self.assertRaises(IntegrityError):
+            bulk_import(Product, ProductValidator(), records, chunk_size=2, atomic=True)
+        # The first chunk was saved, and the second was rolled back
+        self.assertEqual(sorted(Product.objects.values_list('code', flat=True)), ['P0', 'P1'])
+
+    def test_make_object(self):
+        def make_object(cleaned_data):
+            return Product(description='Imported', **cleaned_data)
+        bulk_import(Product, ProductValidator(), self.make_records(2), make_object=make_object)
+        self.assertEqual(Product.objects.filter(description='Imported').count(), 2)
+
+    def test_prefetch_converted_keys(self):
+        # UUID keys are converted from strings by the model field,
+        # and are still found by the prefetch when each record is cleaned
+        vouchers = [Voucher.objects.create(code=str(i)) for i in range(5)]
+        validator = Validator(fields={
+            'name': StringField(),
+            'voucher': ForeignKeyField(Voucher, key_type=str),
+        })
+        records = [{'name': voucher.code, 'voucher': str(voucher.pk).upper()}
+                   for voucher in vouchers]
+
+        def make_object(cleaned_data):
+            return TestModel(name=cleaned_data['voucher'].code)
+
+        # One query for the vouchers, and one to insert
+        with self.assertNumQueries(2):
+            result = bulk_import(TestModel, validator, records, make_object=make_object)
+        self.assertEqual(result.created, 5)
+
+
+class TestFormData(ValidatorTestCase):
+
+    def make_validator(self, **kwargs):
+        return Validator(fields={
+            'name': StringField(),
+            'tags': ListField(StringField(), required=False),
+            'upload': UploadedFileField(required=False),
+        }, **kwargs)
+
+    def test_query_dict(self):
+        validator = self.make_validator()
+        data = QueryDict('name=first&name=last&tags=a&tags=b')
+        self.assertEqual(validator.clean(FormData(validator, data)), {
+            'name': 'last',
+            'tags': ['a', 'b'],
+        })
+
+        data = QueryDict('name=foo&tags=a')
+        self.assertEqual(validator.clean(FormData(validator, data)), {
+            'name': 'foo',
+            'tags': ['a'],
+        })
+
+    def test_files(self):
+        validator = self.make_validator()
+        upload = SimpleUploadedFile('file', b'data')
+        data = FormData(validator, QueryDict('name=foo'), MultiValueDict({'upload': [upload]}))
+        self.assertEqual(validator.clean(data), {'name': 'foo', 'upload': upload})
+        self.assertEqual(list(data), ['name', 'upload'])
+        self.assertEqual(len(data), 2)
+
+    def test_errors(self):
+        validator = self.make_validator()
+        data = QueryDict('tags=a&other=1')
+        with self.assertRaises(InvalidDataException) as cm:
+            validator.clean(FormData(validator, data))
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('name',), "This field is required"),
+            (('other',), "Unknown field"),
+        })
+
+    def test_first_data_wins(self):
+        validator = self.make_validator()
+        data = FormData(validator, QueryDict('name=a'), QueryDict('name=b&tags=c'))
+        self.assertEqual(validator.clean(data), {'name': 'a', 'tags': ['c']})
+
+
+class OrderValidator(Validator):
+    name = StringField()
+    quantities = ListField(IntegerField(), required=False)
+
+
+@validate_request(OrderValidator(), max_body_size=100)
+def order_view(request):
+    return JsonResponse({'cleaned': request.cleaned_data})
+
+
+@validate_request(OrderValidator())
+async def async_order_view(request):
+    return JsonResponse({'cleaned': request.cleaned_data})
+
+
+@validate_request(OrderValidator(), methods=['POST'])
+def order_list_view(request):
+    if request.method != 'POST':
+        return JsonResponse({'cleaned': None})
+    return JsonResponse({'cleaned': request.cleaned_data})
+
+
+class AsyncOrderView(ValidateRequestMixin, View):
+    validator = OrderValidator()
+
+    async def get(self, request):
+        return JsonResponse({'cleaned': None})
+
+    async def post(self, request):
+        return JsonResponse({'cleaned': request.cleaned_data})
+
+
+class OrderView(ValidateRequestMixin, View):
+    validator = OrderValidator()
+    max_body_size = 100
+
+    def get(self, request):
+        return JsonResponse({'cleaned': None})
+
+    def post(self, request):
+        return JsonResponse({'cleaned': request.cleaned_data})
+
+
+class TestValidateRequest(ValidatorTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def post_json(self, view, data, **kwargs):
+        body = data if isinstance(data, (str, bytes)) else json.dumps(data)
+        request = self.factory.post('/', body, content_type='application/json', **kwargs)
+        return view(request)
+
+    def assertResponse(self, response, status, data):
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content.decode('utf-8')), data)
+
+    def test_json(self):
+        response = self.post_json(order_view, {'name': 'foo', 'quantities': [1, 2]})
+        self.assertResponse(response, 200, {'cleaned': {'name': 'foo', 'quantities': [1, 2]}})
+
+    def test_form(self):
+        request = self.factory.post(
+            '/', 'name=foo&quantities=1', content_type='application/x-www-form-urlencoded')
+        self.assertResponse(order_view(request), 400, {'errors': {
+            '/quantities/0': [
+                {'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+        }})
+
+        request = self.factory.post(
+            '/', 'name=foo&name=bar', content_type='application/x-www-form-urlencoded')
+        self.assertResponse(order_view(request), 200, {'cleaned': {'name': 'bar'}})
+
+    def test_invalid(self):
+        response = self.post_json(order_view, {'quantities': [1, 'two']})
+        self.assertResponse(response, 400, {'errors': {
+            '/name': [{'code': 'required', 'message': "This field is required"}],
+            '/quantities/1': [
+                {'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+        }})
+
+    def test_invalid_json(self):
+        invalid_json = {'errors': {'': [{'code': 'invalid_json', 'message': "Invalid JSON"}]}}
+        self.assertResponse(self.post_json(order_view, '{"name": '), 400, invalid_json)
+        self.assertResponse(self.post_json(order_view, b'\xff'), 400, invalid_json)
+        self.assertResponse(self.post_json(order_view, [1, 2]), 400, {'errors': {
+            '': [{'code': 'invalid_type', 'message': "Expected a JSON object"}]}})
+
+    def test_max_body_size(self):
+        too_large = {'errors': {
+            '': [{'code': 'too_large', 'message': "Request body too large"}]}}
+        self.assertResponse(self.post_json(order_view, {'name': 'x' * 100}), 413, too_large)
+
+        # The declared size is checked before the body is read
+        request = self.factory.post(
+            '/', '{}', content_type='application/json', CONTENT_LENGTH='1000000')
+        with mock.patch.object(type(request), 'body', new_callable=mock.PropertyMock) as body:
+            self.assertResponse(order_view(request), 413, too_large)
+        body.assert_not_called()
+
+    def test_async(self):
+        request = self.factory.post(
+            '/', json.dumps({'name': 'foo'}), content_type='application/json')
+        response = async_to_sync(async_order_view)(request)
+        self.assertResponse(response, 200, {'cleaned': {'name': 'foo'}})
+
+        request = self.factory.post('/', json.dumps({}), content_type='application/json')
+        response = async_to_sync(async_order_view)(request)
+        self.assertEqual(response.status_code, 400)
+
+    def test_mixin(self):
+        view = OrderView.as_view()
+        self.assertResponse(
+            self.post_json(view, {'name': 'foo'}), 200, {'cleaned': {'name': 'foo'}})
+        self.assertEqual(self.post_json(view, {}).status_code, 400)
+        self.assertEqual(self.post_json(view, {'name': 'x' * 100}).status_code, 413)
+        self.assertResponse(view(self.factory.get('/')), 200, {'cleaned': None})
+
+    def test_methods(self):
+        self.assertResponse(order_list_view(self.factory.get('/')), 200, {'cleaned': None})
+        self.assertResponse(
+            self.post_json(order_list_view, {'name': 'foo'}), 200, {'cleaned': {'name': 'foo'}})
+
+        # PUT is not one of the methods for this view
+        request = self.factory.put('/', '', content_type='application/json')
+        self.assertResponse(order_list_view(request), 200, {'cleaned': None})
+
+    @unittest.skipUnless(hasattr(View, 'view_is_async'), "Needs Django 4.1")
+    def test_async_mixin(self):
+        view = AsyncOrderView.as_view()
+        with mock.patch.object(OrderValidator, 'clean', side_effect=AssertionError):
+            response = async_to_sync(view)(self.factory.post(
+                '/', json.dumps({'name': 'foo'}), content_type='application/json'))
+        self.assertResponse(response, 200, {'cleaned': {'name': 'foo'}})
+
+        response = async_to_sync(view)(self.factory.post(
+            '/', json.dumps({}), content_type='application/json'))
+        self.assertEqual(response.status_code, 400)
+        self.assertResponse(async_to_sync(view)(self.factory.get('/')), 200, {'cleaned': None})
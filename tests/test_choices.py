@@ -0,0 +1,154 @@
+import copy
+import enum
+import os
+import pickle
+import tempfile
+import types
+
+from valedictory import Validator
+from valedictory.choices import LazyChoices, freeze
+from valedictory.exceptions import ValidationException
+from valedictory.fields import ChoiceField, ChoiceMapField
+
+from .utils import ValidatorTestCase
+
+
+class TestFreeze(ValidatorTestCase):
+    def test_set(self):
+        frozen = freeze(['a', 'b', 'a'])
+        self.assertEqual(frozen, frozenset(['a', 'b']))
+        self.assertIs(frozen, freeze(frozen))
+
+    def test_mapping(self):
+        frozen = freeze({'a': 1})
+        self.assertIsInstance(frozen, types.MappingProxyType)
+        self.assertEqual(dict(frozen), {'a': 1})
+        self.assertIs(frozen, freeze(frozen))
+
+
+class TestLazyChoices(ValidatorTestCase):
+    def test_lazy(self):
+        calls = []
+
+        def loader():
+            calls.append(True)
+            return ['a', 'b']
+
+        choices = LazyChoices(loader)
+        self.assertFalse(choices.loaded)
+        self.assertEqual(calls, [])
+
+        self.assertIn('a', choices)
+        self.assertNotIn('c', choices)
+        self.assertEqual(len(choices), 2)
+        self.assertEqual(calls, [True])
+        self.assertEqual(choices.load(), frozenset(['a', 'b']))
+
+    def test_copy(self):
+        choices = LazyChoices(lambda: ['a'])
+        self.assertIs(choices, copy.copy(choices))
+        self.assertIs(choices, copy.deepcopy(choices))
+
+    def test_from_file(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('2000\n 2600 \n\n7000\n')
+
+        choices = LazyChoices.from_file(path)
+        self.assertEqual(choices.load(), frozenset(['2000', '2600', '7000']))
+
+    def test_pickle(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('2000\n2600\n')
+
+        choices = LazyChoices.from_file(path)
+        choices.load()
+        field = ChoiceField(choices)
+        validator = Validator(fields={'a': field, 'b': copy.deepcopy(field)})
+
+        unpickled = pickle.loads(pickle.dumps(validator))
+        self.assertFalse(unpickled['a'].choices.loaded)
+        self.assertIs(unpickled['a'].choices, unpickled['b'].choices)
+        self.assertEqual(unpickled.clean({'a': '2000', 'b': '2600'}), {'a': '2000', 'b': '2600'})
+
+
+class TestSharedChoices(ValidatorTestCase):
+    def test_choice_field_frozenset(self):
+        choices = frozenset(['a', 'b'])
+        field = ChoiceField(choices)
+        self.assertIs(field.choices, choices)
+        self.assertIs(copy.deepcopy(field).choices, choices)
+
+    def test_choice_field_set_copied(self):
+        choices = {'a', 'b'}
+        field = ChoiceField(choices)
+        self.assertIsNot(field.choices, choices)
+        self.assertIsNot(copy.deepcopy(field).choices, field.choices)
+
+    def test_choice_map_field_proxy(self):
+        choices = types.MappingProxyType({'a': 1})
+        field = ChoiceMapField(choices)
+        self.assertIs(field.choices, choices)
+        self.assertIs(copy.deepcopy(field).choices, choices)
+        self.assertEqual(1, field.clean('a'))
+
+    def test_validators_share_lazy_choices(self):
+        calls = []
+
+        def loader():
+            calls.append(True)
+            return ['a', 'b']
+
+        class ChoiceValidator(Validator):
+            choice = ChoiceField(LazyChoices(loader))
+
+        class ChildValidator(ChoiceValidator):
+            pass
+
+        validators = [ChoiceValidator(), ChoiceValidator(), ChildValidator()]
+        self.assertEqual(calls, [])
+        for validator in validators:
+            self.assertEqual({'choice': 'a'}, validator.clean({'choice': 'a'}))
+        self.assertEqual(calls, [True])
+
+        choices = {id(validator.fields['choice'].choices) for validator in validators}
+        self.assertEqual(len(choices), 1)
+
+    def test_lazy_choice_field(self):
+        field = ChoiceField(LazyChoices(lambda: ['a', 'b']))
+        self.assertEqual('a', field.clean('a'))
+        for invalid in ['c', {}, []]:
+            with self.assertRaises(ValidationException):
+                field.clean(invalid)
+
+    def test_lazy_choice_map_field(self):
+        field = ChoiceMapField(LazyChoices(lambda: {'a': 1, 'b': 2}))
+        self.assertEqual(2, field.clean('b'))
+        for invalid in ['c', {}, []]:
+            with self.assertRaises(ValidationException):
+                field.clean(invalid)
+
+    def test_loader_errors(self):
+        calls = []
+
+        def loader():
+            calls.append(True)
+            raise OSError("Could not load choices")
+
+        for field in [ChoiceField(LazyChoices(loader)), ChoiceMapField(LazyChoices(loader))]:
+            with self.assertRaises(OSError):
+                field.clean('a')
+        self.assertEqual(len(calls), 2)
+
+    def test_enum_choices(self):
+        class Color(enum.Enum):
+            RED = 'red'
+            BLUE = 'blue'
+
+        field = ChoiceField(Color)
+        self.assertEqual(Color.RED, field.clean(Color.RED))
+        with self.assertRaises(ValidationException):
+            field.clean('green')
@@ -0,0 +1,76 @@
+import datetime
+import itertools
+
+import aniso8601
+
+from valedictory import dateparse
+
+from .utils import ValidatorTestCase
+
+
+def parse_or_error(parser, value):
+    try:
+        return parser(value)
+    except (ValueError, NotImplementedError):
+        return ValueError
+
+
+class TestEquivalence(ValidatorTestCase):
+    """
+    The fast parsers must give the same results as aniso8601 does.
+    """
+
+    def assertEquivalent(self, fast_parser, slow_parser, value):
+        fast = parse_or_error(fast_parser, value)
+        slow = parse_or_error(slow_parser, value)
+        self.assertEqual(fast, slow, value)
+        if isinstance(slow, (datetime.datetime, datetime.time)):
+            self.assertEqual(
+                fast.utcoffset(), slow.utcoffset(), value)
+
+    def test_datetime(self):
+        dates = ['1989-10-16', '2016-02-29', '2015-02-29', '2018-13-01',
+                 '0000-01-01', '9999-12-31', '19891016']
+        times = ['08:23:45', '00:00:00', '23:59:59', '24:00:00', '23:59:60',
+                 '08:23:45.5', '08:23:45.123', '08:23:45.000001',
+                 '08:23:45.999999', '08:23:45.1234567', '08:23', '082345']
+        zones = ['', 'Z', '+00:00', '-00:00', '+10:00', '-05:30', '+23:59',
+                 '+0530', '-05', 'z']
+        for date, time, zone in itertools.product(dates, times, zones):
+            self.assertEquivalent(
+                dateparse.parse_datetime, aniso8601.parse_datetime,
+                date + 'T' + time + zone)
+
+    def test_datetime_garbage(self):
+        for value in ['', 'Not even a date', '1989-10-16t08:23:45Z',
+                      '1989-10-16 08:23:45Z', '1989-10-16T08:23:45,5Z',
+                      '1989-10-16T08:23:45Z ', '١٩٨٩-10-16T08:23:45Z']:
+            self.assertEquivalent(
+                dateparse.parse_datetime, aniso8601.parse_datetime, value)
+
+    def test_date(self):
+        for value in ['1989-10-16', '2345-06-07', '2016-02-29', '2015-02-29',
+                      '2015-00-01', '2015-01-32', '0000-01-01', '19891016',
+                      '2018-02', '2018', '10000-01-01', '999-01-01',
+                      '2015-2-29', 'Not even a date']:
+            self.assertEquivalent(
+                dateparse.parse_date, aniso8601.parse_date, value)
+
+    def test_time(self):
+        times = ['08:23:45', '00:00:00', '24:00:00', '23:59:60', '25:00:00',
+                 '08:23:45.5', '08:23:45.000001', '08:23:45.1234567',
+                 '08:23', '0823', 'nope']
+        zones = ['', 'Z', '+00:00', '-00:00', '+10:00', '-05:30']
+        for time, zone in itertools.product(times, zones):
+            self.assertEquivalent(
+                dateparse.parse_time, aniso8601.parse_time, time + zone)
+
+    def test_year_month(self):
+        def strptime(value):
+            date = datetime.datetime.strptime(value, '%Y-%m').date()
+            return (date.year, date.month)
+
+        for value in ['1989-10', '2345-06', '0000-01', '0001-01', '2018-00',
+                      '2018-13', '2018-1', '10000-01', '999-01', 'nope-no']:
+            self.assertEquivalent(
+                dateparse.parse_year_month, strptime, value)
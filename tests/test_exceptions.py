@@ -1,5 +1,10 @@
+import io
+import json
+import pickle
+
 from valedictory import Validator, fields
-from valedictory.exceptions import InvalidDataException, ValidationException
+from valedictory.exceptions import (
+    IndexRange, InvalidDataException, ListErrors, ValidationException)
 
 from .utils import ValidatorTestCase
 
@@ -102,3 +107,209 @@ class TestFlatten(ValidatorTestCase):
             (('bar', 1), 'bar 1 error'),
             (('bar', 3), 'bar 3 error'),
             (('foo',), 'foo error')]))
+
+    def test_deep_nesting(self):
+        # Errors are flattened without recursion, so depth is not limited
+        errors = InvalidDataException({'leaf': [ValidationException("leaf error", 'leaf')]})
+        for i in range(5000):
+            errors = InvalidDataException({'nested': [errors]})
+
+        [(path, message)] = list(errors.flatten())
+        self.assertEqual(path, ('nested',) * 5000 + ('leaf',))
+        self.assertEqual(message, "leaf error")
+        self.assertEqual(list(errors.to_dict()), ['/nested' * 5000 + '/leaf'])
+
+
+class TestSerialise(ValidatorTestCase):
+
+    def make_errors(self):
+        return InvalidDataException({
+            'name': [
+                ValidationException("name error 1", 'name_1'),
+                ValidationException("name error 2", 'name_2'),
+            ],
+            'items': [InvalidDataException({
+                2: [InvalidDataException({
+                    'quantity': [ValidationException("quantity error", 'quantity')],
+                })],
+                3: [ValidationException("item 3 error", 'item')],
+            })],
+            'a/b~c': [ValidationException('Escaped "error"', 'escaped')],
+        })
+
+    def test_to_dict(self):
+        self.assertEqual(self.make_errors().to_dict(), {
+            '/name': [
+                {'code': 'name_1', 'message': "name error 1"},
+                {'code': 'name_2', 'message': "name error 2"},
+            ],
+            '/items/2/quantity': [{'code': 'quantity', 'message': "quantity error"}],
+            '/items/3': [{'code': 'item', 'message': "item 3 error"}],
+            '/a~1b~0c': [{'code': 'escaped', 'message': 'Escaped "error"'}],
+        })
+
+    def test_to_json(self):
+        errors = self.make_errors()
+        self.assertEqual(json.loads(errors.to_json()), errors.to_dict())
+
+        buffer = io.StringIO()
+        self.assertIsNone(errors.to_json(buffer))
+        self.assertEqual(buffer.getvalue(), errors.to_json())
+
+    def test_no_code(self):
+        errors = InvalidDataException({'name': [ValidationException("name error", None)]})
+        self.assertEqual(errors.to_dict(), {'/name': [{'code': None, 'message': "name error"}]})
+        self.assertEqual(json.loads(errors.to_json()), errors.to_dict())
+
+    def test_empty(self):
+        self.assertEqual(InvalidDataException().to_dict(), {})
+        self.assertEqual(InvalidDataException().to_json(), '{}')
+
+
+class TestListErrors(ValidatorTestCase):
+
+    def invalid_type(self):
+        return ValidationException("Expected a value of type 'integer'", 'invalid_type')
+
+    def test_runs(self):
+        errors = ListErrors()
+        for i in range(40000):
+            errors.add(i, self.invalid_type())
+        errors.add(40000, ValidationException("Too small", 'min_value'))
+        errors.add(40002, self.invalid_type())
+
+        self.assertEqual(len(errors.invalid_fields.runs), 3)
+        self.assertEqual(len(errors.invalid_fields), 40002)
+        self.assertNotIn(40001, errors.invalid_fields)
+        self.assertEqual(
+            str(errors),
+            "{0..39999: [<ValidationException: (invalid_type) Expected a value of type 'integer'>],"
+            " 40000: [<ValidationException: (min_value) Too small>],"
+            " 40002: [<ValidationException: (invalid_type) Expected a value of type 'integer'>]}")
+
+        flattened = list(errors.flatten())
+        self.assertEqual(len(flattened), 40002)
+        self.assertEqual(flattened[0], ((0,), "Expected a value of type 'integer'"))
+        self.assertEqual(flattened[-1], ((40002,), "Expected a value of type 'integer'"))
+        self.assertEqual(errors.invalid_fields[39999], [self.invalid_type()])
+
+    def test_equality(self):
+        errors = ListErrors()
+        expected = InvalidDataException()
+        for i in [0, 1, 2, 5]:
+            errors.add(i, self.invalid_type())
+            expected.add(i, self.invalid_type())
+        self.assertEqual(errors, expected)
+        self.assertEqual(expected, errors)
+        self.assertEqual(errors, ListErrors(expected.invalid_fields))
+
+        expected.add(6, self.invalid_type())
+        self.assertNotEqual(errors, expected)
+
+    def test_out_of_order(self):
+        errors = ListErrors()
+        for i in range(10):
+            errors.add(i, self.invalid_type())
+        missing = ValidationException("Missing", 'missing')
+        errors.add(4, missing)
+        errors.add(20, missing)
+        errors.add(15, missing)
+
+        self.assertEqual(list(errors.invalid_fields.compact_items()), [
+            (IndexRange(0, 4), [self.invalid_type()]),
+            (4, [self.invalid_type(), missing]),
+            (IndexRange(5, 10), [self.invalid_type()]),
+            (15, [missing]),
+            (20, [missing]),
+        ])
+        self.assertEqual(errors.invalid_fields[3], [self.invalid_type()])
+        self.assertEqual(errors.invalid_fields[4], [self.invalid_type(), missing])
+        self.assertEqual(errors.invalid_fields[5], [self.invalid_type()])
+        self.assertEqual(list(errors.invalid_fields), list(range(10)) + [15, 20])
+
+    def test_change_item_errors(self):
+        errors = ListErrors()
+        for i in range(3):
+            errors.add(i, self.invalid_type())
+        missing = ValidationException("Missing", 'missing')
+
+        errors.invalid_fields[0].append(missing)
+        self.assertEqual(errors.invalid_fields[0], [self.invalid_type(), missing])
+        self.assertEqual(errors.invalid_fields[1], [self.invalid_type()])
+        self.assertEqual(errors.invalid_fields[2], [self.invalid_type()])
+        self.assertEqual(errors.to_dict(), {
+            '/0': [
+                {'code': 'invalid_type', 'message': "Expected a value of type 'integer'"},
+                {'code': 'missing', 'message': "Missing"},
+            ],
+            '/1': [{'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+            '/2': [{'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+        })
+
+        # A list that has been handed out is not joined in to a run
+        errors.invalid_fields[3].append(self.invalid_type())
+        errors.add(4, self.invalid_type())
+        errors.invalid_fields[3].append(missing)
+        self.assertEqual(errors.invalid_fields[4], [self.invalid_type()])
+
+    def test_missing_item_errors(self):
+        errors = ListErrors()
+        errors.add(0, self.invalid_type())
+        self.assertNotIn(5, errors.invalid_fields)
+        self.assertIsNone(errors.invalid_fields.get(5))
+        self.assertEqual(errors.invalid_fields[5], [])
+
+        errors.invalid_fields[7].append(self.invalid_type())
+        self.assertEqual(list(errors.invalid_fields), [0, 5, 7])
+        self.assertEqual(errors.invalid_fields[7], [self.invalid_type()])
+        self.assertEqual(errors.to_dict(), {
+            '/0': [{'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+            '/7': [{'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}],
+        })
+
+    def test_nested_errors_not_grouped(self):
+        errors = ListErrors()
+        nested = InvalidDataException({'name': [ValidationException("Required", 'required')]})
+        errors.add(0, nested)
+        errors.add(1, nested)
+        self.assertEqual(len(errors.invalid_fields.runs), 2)
+
+    def test_compact_serialise(self):
+        errors = InvalidDataException({'items': [ListErrors({
+            i: [self.invalid_type()] for i in range(1000)})]})
+        error = {'code': 'invalid_type', 'message': "Expected a value of type 'integer'"}
+
+        self.assertEqual(errors.to_dict(compact=True), {'/items/0..999': [error]})
+        self.assertEqual(json.loads(errors.to_json(compact=True)), {'/items/0..999': [error]})
+        self.assertEqual(len(errors.to_dict()), 1000)
+        self.assertEqual(errors.to_dict()['/items/999'], [error])
+
+
+class TestPickle(ValidatorTestCase):
+
+    def test_validation_exception(self):
+        error = ValidationException("Too small", 'min_value')
+        unpickled = pickle.loads(pickle.dumps(error))
+        self.assertEqual(unpickled.code, 'min_value')
+        self.assertEqual(unpickled.msg, "Too small")
+
+    def test_invalid_data_exception(self):
+        items = ListErrors()
+        for i in range(1000):
+            items.add(i, ValidationException("Not a number", 'invalid_type'))
+        errors = InvalidDataException({
+            'name': [ValidationException("Required", 'required')],
+            'items': [items],
+        })
+
+        data = pickle.dumps(errors)
+        self.assertLess(len(data), 512)
+        unpickled = pickle.loads(data)
+        self.assertEqual(unpickled, errors)
+        self.assertEqual(unpickled.to_dict(), errors.to_dict())
+        self.assertEqual(len(unpickled.invalid_fields['items'][0].invalid_fields.runs), 1)
+
+        # Errors can be added to an unpickled exception
+        unpickled.add('age', ValidationException("Required", 'required'))
+        unpickled.invalid_fields['items'][0].add(1000, ValidationException("Gone", 'gone'))
+        self.assertEqual(len(unpickled.invalid_fields['items'][0].invalid_fields), 1001)
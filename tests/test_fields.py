@@ -2,15 +2,19 @@ import copy
 import datetime
 import math
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-from valedictory import Validator
+from valedictory import Validator, scope
 from valedictory.exceptions import (
-    InvalidDataException, NoData, ValidationException)
+    InvalidDataException, ListErrors, NoData, ValidationException)
 from valedictory.fields import (
     BooleanField, ChoiceField, ChoiceMapField, CreditCardField, DateField,
     DateTimeField, DigitField, EmailField, Field, FloatField, IntegerField,
-    ListField, NestedValidator, NumberField, StringField, TypedField,
-    YearMonthField)
+    ListField, NestedValidator, NumberField, PunctuatedCharacterField,
+    StringField, TimeField, TypedField, YearMonthField)
 
 from .utils import ValidatorTestCase
 
@@ -246,6 +250,32 @@ class TestDateTimeField(ValidatorTestCase):
             datetime.datetime(1989, 10, 16, 8, 23, 45, tzinfo=None),
             field.clean("1989-10-16T08:23:45"))
 
+    def test_shared_timezones(self):
+        field = DateTimeField()
+        first = field.clean("1989-10-16T08:23:45+10:00")
+        second = field.clean("2018-01-02T03:04:05.678+10:00")
+        basic = field.clean("20180102T030405+1000")
+        self.assertIs(first.tzinfo, second.tzinfo)
+        self.assertIs(first.tzinfo, basic.tzinfo)
+        self.assertIs(field.clean("1989-10-16T08:23:45Z").tzinfo, datetime.timezone.utc)
+        self.assertIs(field.clean("1989-10-16T08:23:45+00:00").tzinfo, datetime.timezone.utc)
+
+    def test_normalize_to_utc(self):
+        field = DateTimeField(normalize_to_utc=True)
+        value = field.clean("1989-10-16T08:23:45+10:00")
+        self.assertEqual(
+            datetime.datetime(1989, 10, 15, 22, 23, 45, tzinfo=datetime.timezone.utc),
+            value)
+        self.assertIs(value.tzinfo, datetime.timezone.utc)
+
+        with self.assertRaises(ValidationException):
+            field.clean("0001-01-01T00:00:00+10:00")
+
+        naive_field = DateTimeField(timezone_required=False, normalize_to_utc=True)
+        self.assertEqual(
+            datetime.datetime(1989, 10, 16, 8, 23, 45),
+            naive_field.clean("1989-10-16T08:23:45"))
+
     def test_invalid_dates(self):
         field = DateTimeField()
 
@@ -302,6 +332,35 @@ class TestDateField(ValidatorTestCase):
             field.clean("Not even a date")
 
 
+class TestTimeField(ValidatorTestCase):
+
+    def test_simple(self):
+        field = TimeField()
+        self.assertEqual(
+            datetime.time(8, 23, 45, tzinfo=datetime.timezone.utc),
+            field.clean("08:23:45Z"))
+        self.assertEqual(
+            datetime.time(8, 23, 45, 500000, tzinfo=datetime.timezone(
+                datetime.timedelta(hours=10))),
+            field.clean("08:23:45.5+10:00"))
+
+    def test_timezone_required(self):
+        field = TimeField()
+        with self.assertRaises(ValidationException):
+            field.clean("08:23:45")
+
+    def test_optional_timezone(self):
+        field = TimeField(timezone_required=False)
+        self.assertEqual(datetime.time(8, 23, 45), field.clean("08:23:45"))
+
+    def test_invalid_times(self):
+        field = TimeField()
+        with self.assertRaises(ValidationException):
+            field.clean("25:00:00Z")
+        with self.assertRaises(ValidationException):
+            field.clean("Not a time")
+
+
 class TestYearMonthField(ValidatorTestCase):
 
     def test_simple(self):
@@ -368,6 +427,53 @@ class TestChoiceMapField(ValidatorTestCase):
                 field.clean(choice)
 
 
+class TestPunctuatedCharacterField(ValidatorTestCase):
+
+    def test_simple(self):
+        field = PunctuatedCharacterField(alphabet='abc', punctuation='.-')
+        self.assertEqual("abcabc", field.clean("abc.abc"))
+        self.assertEqual("cab", field.clean("-c-a-b-"))
+        self.assertEqual("", field.clean(""))
+
+    def test_invalid(self):
+        field = PunctuatedCharacterField(alphabet='abc', punctuation='.-')
+        with self.assertRaises(ValidationException):
+            field.clean("abcd")
+        with self.assertRaises(ValidationException):
+            field.clean("abc_abc")
+        with self.assertRaises(ValidationException):
+            field.clean("abcé")
+
+    def test_non_ascii(self):
+        field = PunctuatedCharacterField(alphabet='αβγabc', punctuation='·-')
+        self.assertEqual("αβγ", field.clean("α·β-γ"))
+        self.assertEqual("abc", field.clean("a·b-c"))
+        self.assertEqual("abc", field.clean("a-b-c"))
+        with self.assertRaises(ValidationException):
+            field.clean("α·β·δ")
+
+    def test_change_characters(self):
+        field = PunctuatedCharacterField(alphabet='abc', punctuation='')
+        self.assertEqual("abc", field.clean("abc"))
+        field.alphabet = 'xyz'
+        field.punctuation = '.'
+        self.assertEqual("xyz", field.clean("x.y.z"))
+        with self.assertRaises(ValidationException):
+            field.clean("abc")
+
+    def test_characters_set_after_init(self):
+        class HexField(PunctuatedCharacterField):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.alphabet = '0123456789abcdef'
+                self.punctuation = ':'
+
+        field = HexField()
+        self.assertEqual("0a1b", field.clean("0a:1b"))
+        with self.assertRaises(ValidationException):
+            field.clean("0g")
+
+
 class TestDigitField(ValidatorTestCase):
 
     def test_simple(self):
@@ -390,6 +496,9 @@ class TestDigitField(ValidatorTestCase):
             field.clean("123abc")
         with self.assertRaises(ValidationException):
             field.clean("abc123")
+        with self.assertRaises(ValidationException):
+            # Arabic-Indic digits are still not in the alphabet
+            field.clean("١٢٣")
 
 
 class TestCreditCardField(ValidatorTestCase):
@@ -413,6 +522,29 @@ class TestCreditCardField(ValidatorTestCase):
         with self.assertRaises(ValidationException):
             field.clean('5111111111111111')
 
+    def test_clean_many(self):
+        field = CreditCardField()
+        valid = ["5123 4567 8901 2346", "4111-1111-1111-1111"] * 50
+        self.assertEqual(
+            ["5123456789012346", "4111111111111111"] * 50,
+            field.clean_many(valid))
+
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean_many(valid + ['5123_4567_8901_2346', '5111111111111111', 10])
+        self.assertEqual(cm.exception, InvalidDataException({
+            100: [ValidationException("", 'allowed_characters')],
+            101: [ValidationException("", 'luhn_checksum')],
+            102: [ValidationException("", 'invalid_type')],
+        }))
+
+    def test_list(self):
+        field = ListField(CreditCardField())
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean(["4111-1111-1111-1111"] * 100 + ['5111111111111111'])
+        self.assertEqual(cm.exception, InvalidDataException({
+            100: [ValidationException("", 'luhn_checksum')],
+        }))
+
 
 class TestListField(ValidatorTestCase):
     def test_string_list(self):
@@ -446,6 +578,58 @@ class TestListField(ValidatorTestCase):
         else:
             self.fail("Expecting to catch ValidationException")
 
+    def test_bad_list_errors(self):
+        field = ListField(IntegerField(min=0, max=10))
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean([1, True, 3, 11, -1, 2.0, 5])
+        self.assertEqual(cm.exception, InvalidDataException({
+            1: [ValidationException("", 'invalid_type')],
+            3: [ValidationException("", 'max_value')],
+            4: [ValidationException("", 'min_value')],
+            5: [ValidationException("", 'invalid_type')],
+        }))
+
+    def test_homogeneous_lists(self):
+        """
+        Lists of simple values are checked in one pass,
+        and should give the same results as checking each item.
+        """
+        class Number(int):
+            pass
+
+        cases = [
+            (IntegerField(), [1, 2, Number(3)], []),
+            (IntegerField(min=1, max=3), [1, 2, 3], [[0], [4], [1, True]]),
+            (NumberField(min=0), [0, 1.5, float('nan')], [[-1, float('nan')]]),
+            (StringField(), ['a', 'b'], [[''], ['a', 1]]),
+            (StringField(required=False), ['', 'a'], [[None]]),
+            (StringField(min_length=2, max_length=3), ['ab', 'abc'], [['a'], ['abcd']]),
+            (BooleanField(), [True, False], [[0], [1, True]]),
+            (EmailField(), ['a@b.co'], [['a']]),
+        ]
+        for field, valid, invalid_lists in cases:
+            list_field = ListField(field)
+            cleaned = list_field.clean(valid)
+            self.assertEqual(cleaned, valid)
+            self.assertIsNot(cleaned, valid)
+            for invalid in invalid_lists:
+                with self.assertRaises(InvalidDataException):
+                    list_field.clean(invalid)
+
+    def test_min_max_items(self):
+        field = ListField(IntegerField(), min_items=1, max_items=3)
+        self.assertEqual([1], field.clean([1]))
+        self.assertEqual([1, 2, 3], field.clean([1, 2, 3]))
+
+        with self.assertRaises(ValidationException) as cm:
+            field.clean([])
+        self.assertEqual(cm.exception.code, 'min_items')
+
+        # Items are not checked if there are too many
+        with self.assertRaises(ValidationException) as cm:
+            field.clean(['a', 'b', 'c', 'd'])
+        self.assertEqual(cm.exception.code, 'max_items')
+
     def test_copy(self):
         original = ListField(TypedField(
             required_types=(bool, str),
@@ -492,3 +676,138 @@ class TestNestedLists(ValidatorTestCase):
         self.assertEqual(
             data,
             field.clean(data))
+
+
+class TestConcurrentListField(ValidatorTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_order(self):
+        class SlowIntegerField(IntegerField):
+            def clean(self, data):
+                # Later items finish first
+                time.sleep((10 - data) / 1000)
+                return super().clean(data) * 2
+
+        field = ListField(SlowIntegerField(), executor=self.executor)
+        self.assertEqual([i * 2 for i in range(10)], field.clean(list(range(10))))
+
+    def test_errors(self):
+        field = ListField(IntegerField(min=0), executor=self.executor, concurrency=2)
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean([1, "nope", 3, -1, 5])
+        self.assertEqual(cm.exception, InvalidDataException({
+            1: [ValidationException("", 'invalid_type')],
+            3: [ValidationException("", 'min_value')],
+        }))
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        running = [0]
+        most_running = [0]
+
+        class CountingField(Field):
+            def clean(self, data):
+                with lock:
+                    running[0] += 1
+                    most_running[0] = max(most_running[0], running[0])
+                time.sleep(0.005)
+                with lock:
+                    running[0] -= 1
+                return data
+
+        field = ListField(CountingField(), executor=self.executor, concurrency=2)
+        self.assertEqual(list(range(20)), field.clean(list(range(20))))
+        self.assertLessEqual(most_running[0], 2)
+
+    def test_copy(self):
+        field = ListField(IntegerField(), executor=self.executor)
+        copied = copy.deepcopy(field)
+        self.assertIs(copied.executor, self.executor)
+        self.assertEqual([1, 2], copied.clean([1, 2]))
+
+    def test_scope(self):
+        class ScopeField(Field):
+            def clean(self, data):
+                time.sleep(0.001)
+                return id(scope.get('storage'))
+
+        validator = Validator(fields={
+            'items': ListField(ScopeField(), executor=self.executor),
+            'item': ScopeField(),
+        })
+        cleaned = validator.clean({'items': list(range(10)), 'item': 1})
+        self.assertEqual(set(cleaned['items']), {cleaned['item']})
+
+    def test_batches(self):
+        batches = []
+
+        class BatchField(IntegerField):
+            clean_in_batches = True
+
+            def clean_many(self, data):
+                batches.append(list(data))
+                return super().clean_many(data)
+
+        field = ListField(BatchField(min=0), executor=self.executor)
+        self.assertEqual(list(range(10)), field.clean(list(range(10))))
+        self.assertEqual(batches, [list(range(10))])
+
+        batches.clear()
+        field = ListField(BatchField(min=0), executor=self.executor, batch_size=4)
+        with self.assertRaises(InvalidDataException) as cm:
+            field.clean([0, 1, 2, 3, 4, -5, 6, "seven", 8, 9])
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, -5, 6, "seven"], [8, 9]])
+        self.assertEqual(cm.exception, InvalidDataException({
+            5: [ValidationException("", 'min_value')],
+            7: [ValidationException("", 'invalid_type')],
+        }))
+
+    def test_not_in_executor(self):
+        threads = []
+
+        class ThreadField(IntegerField):
+            clean_in_executor = False
+
+            def clean(self, data):
+                threads.append(threading.get_ident())
+                return super().clean(data)
+
+        for field, item in [
+            (ThreadField(), 1),
+            (NestedValidator(Validator(fields={'item': ThreadField()})), {'item': 1}),
+            (ListField(ThreadField()), [1]),
+        ]:
+            self.assertFalse(field.clean_in_executor)
+            list_field = ListField(field, executor=self.executor)
+            self.assertEqual(len(list_field.clean([item] * 4)), 4)
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+        self.assertTrue(NestedValidator(Validator(fields={
+            'item': IntegerField()})).clean_in_executor)
+        self.assertTrue(ListField(IntegerField()).clean_in_executor)
+
+    def test_no_errors_made(self):
+        field = ListField(IntegerField(), executor=self.executor)
+        with mock.patch.object(
+                ListErrors, '__init__', autospec=True,
+                side_effect=ListErrors.__init__) as list_init:
+            self.assertEqual([1, 2, 3], field.clean([1, 2, 3]))
+        list_init.assert_not_called()
+
+    def test_nested_lists(self):
+        # The outer list takes every thread of the executor,
+        # so the inner lists are cleaned in the thread they are in
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+
+        class SlowIntegerField(IntegerField):
+            def clean(self, data):
+                time.sleep(0.001)
+                return super().clean(data)
+
+        field = ListField(
+            ListField(SlowIntegerField(), executor=executor), executor=executor)
+        data = [list(range(4)) for i in range(4)]
+        self.assertEqual(data, field.clean(data))
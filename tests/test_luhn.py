@@ -0,0 +1,69 @@
+import random
+import unittest
+from unittest import mock
+
+from valedictory import luhn
+
+from .utils import ValidatorTestCase
+
+
+def random_card_numbers(count, seed=0):
+    rng = random.Random(seed)
+    card_numbers = []
+    for _ in range(count):
+        length = rng.randint(1, 20)
+        card_numbers.append(''.join(rng.choice('0123456789') for _ in range(length)))
+    return card_numbers
+
+
+class TestChecksum(ValidatorTestCase):
+    def test_valid(self):
+        for card_number in ['5123456789012346', '4111111111111111', '378282246310005', '0']:
+            self.assertTrue(luhn.checksum(card_number), card_number)
+
+    def test_invalid(self):
+        for card_number in ['5111111111111111', '4111111111111112', '1']:
+            self.assertFalse(luhn.checksum(card_number), card_number)
+
+
+class TestChecksumMany(ValidatorTestCase):
+    def test_small_batch(self):
+        card_numbers = random_card_numbers(luhn.numpy_threshold - 1)
+        self.assertEqual(
+            [luhn.checksum(card_number) for card_number in card_numbers],
+            luhn.checksum_many(card_numbers))
+
+    def test_empty(self):
+        self.assertEqual([], luhn.checksum_many([]))
+
+    def test_without_numpy(self):
+        card_numbers = random_card_numbers(1000)
+        with mock.patch.object(luhn, 'get_numpy', return_value=None):
+            self.assertEqual(
+                [luhn.checksum(card_number) for card_number in card_numbers],
+                luhn.checksum_many(card_numbers))
+
+    @unittest.skipIf(luhn.get_numpy() is None, "NumPy is not installed")
+    def test_numpy_equivalence(self):
+        for seed in range(5):
+            card_numbers = random_card_numbers(2000, seed=seed)
+            self.assertEqual(
+                [luhn.checksum(card_number) for card_number in card_numbers],
+                luhn.checksum_many(card_numbers))
+
+    @unittest.skipIf(luhn.get_numpy() is None, "NumPy is not installed")
+    def test_numpy_same_width(self):
+        # Every card number the same odd and even width
+        for width in [15, 16]:
+            card_numbers = [str(n).zfill(width) for n in range(4111111111111100, 4111111111111300)]
+            self.assertEqual(
+                [luhn.checksum(card_number) for card_number in card_numbers],
+                luhn.checksum_many(card_numbers))
+
+    @unittest.skipIf(luhn.get_numpy() is None, "NumPy is not installed")
+    def test_numpy_non_ascii(self):
+        # Non-ASCII digits fall back to checking one at a time
+        card_numbers = random_card_numbers(100) + ['٤١١١١١١١١١١١١١١١']
+        self.assertEqual(
+            [luhn.checksum(card_number) for card_number in card_numbers],
+            luhn.checksum_many(card_numbers))
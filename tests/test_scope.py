@@ -0,0 +1,66 @@
+import asyncio
+
+from valedictory import Validator, fields, scope
+
+from .utils import ValidatorTestCase
+
+
+class ScopeField(fields.Field):
+    """
+    Counts how many times each value is seen while cleaning one piece of data.
+    """
+    def clean(self, data):
+        data = super().clean(data)
+        counts = scope.get(self)
+        if counts is None:
+            return None
+        counts[data] = counts.get(data, 0) + 1
+        return counts[data]
+
+    async def aclean(self, data):
+        # Let other tasks run part way through cleaning
+        await asyncio.sleep(0)
+        return self.clean(data)
+
+
+class TestScope(ValidatorTestCase):
+    def test_no_scope(self):
+        self.assertIsNone(scope.get('key'))
+        self.assertIsNone(ScopeField().clean('a'))
+
+    def test_validator_scope(self):
+        field = ScopeField()
+        validator = Validator(fields={
+            'a': field,
+            'b': field,
+            'nested': fields.NestedValidator(Validator(fields={'c': field})),
+        })
+        data = {'a': 'x', 'b': 'x', 'nested': {'c': 'x'}}
+        self.assertEqual({'a': 1, 'b': 2, 'nested': {'c': 3}}, validator.clean(data))
+
+        # The scope is discarded once clean finishes
+        self.assertEqual({'a': 1, 'b': 2, 'nested': {'c': 3}}, validator.clean(data))
+        self.assertIsNone(scope.get(field))
+
+    def test_scope_after_error(self):
+        validator = Validator(fields={'a': ScopeField(), 'b': fields.IntegerField()})
+        with self.assertRaises(Exception):
+            validator.clean({'a': 'x', 'b': 'nope'})
+        self.assertIsNone(scope.get('key'))
+
+    def test_async_tasks(self):
+        field = ScopeField()
+        validator = Validator(fields={
+            'a': field,
+            'b': field,
+            'nested': fields.NestedValidator(Validator(fields={'c': field})),
+        })
+        data = {'a': 'x', 'b': 'x', 'nested': {'c': 'x'}}
+
+        async def clean_concurrently():
+            return await asyncio.gather(*[validator.aclean(data) for i in range(3)])
+
+        # Each task gets its own scope, shared by the nested validator
+        results = asyncio.run(clean_concurrently())
+        self.assertEqual(results, [{'a': 1, 'b': 2, 'nested': {'c': 3}}] * 3)
+        self.assertIsNone(scope.get(field))
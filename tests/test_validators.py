@@ -1,5 +1,13 @@
+import asyncio
+import gc
+import pickle
+import tracemalloc
+import unittest
+import weakref
+from unittest import mock
+
 from valedictory import InvalidDataException, Validator, fields
-from valedictory.exceptions import ValidationException
+from valedictory.exceptions import ListErrors, ValidationException
 from valedictory.validator import partition_dict
 
 from .utils import ValidatorTestCase
@@ -107,6 +115,31 @@ class TestDeclarativeValidators(ValidatorTestCase):
         self.assertIsInstance(ChildValidator.fields['override'],
                               fields.BooleanField)
 
+    def test_inherited_fields_copied_once(self):
+        copies = []
+
+        class CountingField(fields.IntegerField):
+            def __deepcopy__(self, memo):
+                copies.append(self)
+                return super().__deepcopy__(memo)
+
+        class P1Validator(Validator):
+            int = CountingField()
+
+        class P2Validator(P1Validator):
+            pass
+
+        class P3Validator(P2Validator):
+            pass
+
+        copies.clear()
+
+        class ChildValidator(P3Validator):
+            string = fields.StringField()
+
+        self.assertEqual(copies, [P3Validator.fields['int']])
+        self.assertIsNot(ChildValidator.fields['int'], P3Validator.fields['int'])
+
     def test_methods_and_attributes(self):
         class MyValidator(Validator):
             int = fields.IntegerField()
@@ -192,3 +225,222 @@ class TestCopy(ValidatorTestCase):
         # Check the base validator was not mutated
         self.assertIsNone(ModuloValidator.fields['single'].modulo)
         self.assertIsNone(ModuloValidator.fields['double'].modulo)
+
+
+class AsyncIntegerField(fields.IntegerField):
+    """
+    Waits for the event loop before cleaning, like a field that does I/O.
+    """
+    async def aclean(self, data):
+        await asyncio.sleep(0)
+        return self.clean(data) * 2
+
+
+class TestAsync(ValidatorTestCase):
+
+    def test_aclean(self):
+        validator = Validator(fields={
+            'int': AsyncIntegerField(),
+            'string': fields.StringField(),
+            'list': fields.ListField(AsyncIntegerField(), max_items=3),
+            'nested': fields.NestedValidator(Validator(fields={
+                'int': AsyncIntegerField()})),
+        })
+        data = {'int': 1, 'string': 'foo', 'list': [1, 2], 'nested': {'int': 3}}
+        self.assertEqual(
+            asyncio.run(validator.aclean(data)),
+            {'int': 2, 'string': 'foo', 'list': [2, 4], 'nested': {'int': 6}})
+
+        # The sync path does not use aclean
+        self.assertEqual(validator.clean(data)['list'], [1, 2])
+
+    def test_aclean_errors(self):
+        validator = Validator(fields={
+            'int': AsyncIntegerField(),
+            'list': fields.ListField(AsyncIntegerField(), max_items=3),
+        })
+        data = {'int': 'nope', 'list': [1, 'two'], 'unknown': 1}
+        with self.assertRaises(InvalidDataException) as cm:
+            asyncio.run(validator.aclean(data))
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('int',), "Expected a value of type 'integer'"),
+            (('list', 1), "Expected a value of type 'integer'"),
+            (('unknown',), "Unknown field"),
+        })
+
+        with self.assertRaises(InvalidDataException) as cm:
+            asyncio.run(validator.aclean({'int': 1, 'list': [1, 2, 3, 4]}))
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('list',), "Maximum of 3 items"),
+        })
+
+
+class AddressValidator(Validator):
+    street = fields.StringField()
+    postcode = fields.DigitField(min_length=4, max_length=4)
+    state = fields.ChoiceField(['ACT', 'NSW', 'VIC'])
+
+
+class PersonValidator(Validator):
+    name = fields.StringField()
+    age = fields.IntegerField(required=False)
+    email = fields.EmailField()
+    address = fields.NestedValidator(AddressValidator())
+    tags = fields.ListField(fields.StringField())
+    addresses = fields.ListField(fields.NestedValidator(AddressValidator()))
+
+
+class TestAllocations(ValidatorTestCase):
+    """
+    Cleaning valid data should only allocate the cleaned data,
+    and nothing that is only needed to report errors.
+    """
+
+    address = {'street': '1 Example Street', 'postcode': '2600', 'state': 'ACT'}
+    person = {
+        'name': 'Alex Smith', 'age': 30, 'email': 'alex@example.com',
+        'address': address, 'tags': ['a', 'b'], 'addresses': [address] * 10,
+    }
+
+    def make_validators(self):
+        return [
+            (Validator(fields={
+                'int': fields.IntegerField(),
+                'string': fields.StringField(),
+                'bool': fields.BooleanField(),
+            }), {'int': 1, 'string': 'foo', 'bool': True}),
+            (AddressValidator(), self.address),
+            (PersonValidator(), self.person),
+        ]
+
+    def test_no_errors_made(self):
+        for validator, data in self.make_validators():
+            with mock.patch.object(
+                    InvalidDataException, '__init__', autospec=True,
+                    side_effect=InvalidDataException.__init__) as init, \
+                    mock.patch.object(
+                        ListErrors, '__init__', autospec=True,
+                        side_effect=ListErrors.__init__) as list_init:
+                validator.clean(data)
+            init.assert_not_called()
+            list_init.assert_not_called()
+
+        # Errors are still made when they are needed
+        validator = PersonValidator()
+        with self.assertRaises(InvalidDataException) as cm:
+            validator.clean(dict(self.person, addresses=[{}], unknown=1))
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('addresses', 0, 'street'), "This field is required"),
+            (('addresses', 0, 'postcode'), "This field is required"),
+            (('addresses', 0, 'state'), "This field is required"),
+            (('unknown',), "Unknown field"),
+        })
+
+    def test_clean_fields(self):
+        # clean_fields always returns the errors, even when there are none
+        validator = AddressValidator()
+        cleaned_data, errors = validator.clean_fields(self.address)
+        self.assertEqual(cleaned_data, self.address)
+        self.assertIsInstance(errors, InvalidDataException)
+        self.assertFalse(errors)
+
+        cleaned_data, errors = asyncio.run(validator.aclean_fields(self.address))
+        self.assertIsInstance(errors, InvalidDataException)
+        self.assertFalse(errors)
+
+        errors = InvalidDataException()
+        validator.check_unknown_fields(dict(self.address, unknown=1), errors)
+        self.assertEqual(list(errors.flatten()), [(('unknown',), "Unknown field")])
+
+    def test_overridden_clean_fields(self):
+        class CheckedValidator(AddressValidator):
+            def clean_fields(self, data):
+                cleaned_data, errors = super().clean_fields(data)
+                if cleaned_data.get('state') == 'ACT':
+                    errors.invalid_fields['state'].append(ValidationException("No", 'no'))
+                return cleaned_data, errors
+
+            async def aclean_fields(self, data):
+                return self.clean_fields(data)
+
+        validator = CheckedValidator()
+        with self.assertRaises(InvalidDataException) as cm:
+            validator.clean(self.address)
+        self.assertEqual(list(cm.exception.flatten()), [(('state',), "No")])
+        with self.assertRaises(InvalidDataException) as cm:
+            asyncio.run(validator.aclean(self.address))
+        self.assertEqual(list(cm.exception.flatten()), [(('state',), "No")])
+
+    @unittest.skipUnless(hasattr(tracemalloc, 'reset_peak'), "Needs Python 3.9")
+    def test_temporary_allocations(self):
+        # The memory allocated while cleaning,
+        # other than the memory for the cleaned data that is returned.
+        # Making the errors for each field and nested validator
+        # would take over 800 bytes for each of these.
+        for validator, data in self.make_validators():
+            validator.clean(data)
+            tracemalloc.start()
+            try:
+                tracemalloc.reset_peak()
+                cleaned_data = validator.clean(data)
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.assertEqual(cleaned_data, data)
+            self.assertLess(peak - current, 512)
+
+
+class TestPickle(ValidatorTestCase):
+
+    def test_round_trip(self):
+        validator = pickle.loads(pickle.dumps(PersonValidator()))
+        data = TestAllocations.person
+        self.assertEqual(validator.clean(data), data)
+
+        with self.assertRaises(InvalidDataException) as cm:
+            validator.clean(dict(data, address=dict(data['address'], postcode='26OO')))
+        self.assertEqual(set(cm.exception.flatten()), {
+            (('address', 'postcode'), "Only the characters '0123456789' are allowed"),
+        })
+
+    def test_default_messages_not_pickled(self):
+        field = fields.IntegerField()
+        self.assertNotIn('error_messages', field.__getstate__())
+
+        field = fields.IntegerField(error_messages={'invalid_type': "Not a number"})
+        self.assertEqual(field.__getstate__()['error_messages'], {
+            'invalid_type': "Not a number"})
+
+        field = pickle.loads(pickle.dumps(field))
+        self.assertEqual(field.error_messages, dict(
+            fields.IntegerField().error_messages, invalid_type="Not a number"))
+
+    def test_classes_not_kept_alive(self):
+        class TemporaryField(fields.IntegerField):
+            pass
+
+        TemporaryField().__getstate__()
+        ref = weakref.ref(TemporaryField)
+        del TemporaryField
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_changed_defaults(self):
+        class ChangingField(fields.IntegerField):
+            default_error_messages = {'invalid_type': "Old message"}
+
+        state = ChangingField().__getstate__()
+        ChangingField.default_error_messages = {'invalid_type': "New message"}
+        self.assertEqual(ChangingField().error_messages['invalid_type'], "New message")
+        unpickled = ChangingField.__new__(ChangingField)
+        unpickled.__setstate__(state)
+        self.assertEqual(unpickled.error_messages['invalid_type'], "New message")
+
+    def test_size(self):
+        # The pickles should not grow with the number of default messages
+        validator = PersonValidator()
+        size = len(pickle.dumps(validator))
+        for field in validator.fields.values():
+            field.error_messages = dict(field.error_messages, extra="Extra message")
+        self.assertGreater(len(pickle.dumps(validator)), size)
+        self.assertLess(size, 2048)
@@ -12,4 +12,4 @@ class ValidatorTestCase(unittest.TestCase):
 
     def assertInvalidDataExceptionEqual(self, left, right, msg=None):
         return self.assertDictEqual(
-            left.invalid_fields, right.invalid_fields, msg=msg)
+            dict(left.invalid_fields.items()), dict(right.invalid_fields.items()), msg=msg)
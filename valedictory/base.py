@@ -1,24 +1,45 @@
-import copy
+import weakref
 
 from .exceptions import ValidationException
 
 
 class DeepCopyable:
+    def __copy__(self):
+        # Copy the attributes directly, rather than through the pickling
+        # methods, which may leave things out to be made again
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        return obj
+
     def __deepcopy__(self, memo):
-        obj = copy.copy(self)
+        obj = self.__copy__()
         memo[id(self)] = obj
         return obj
 
 
+def class_error_messages(cls):
+    """
+    Merge the :attr:`default_error_messages` of a class and all its bases.
+    Returns a new dict, which can be changed.
+    """
+    messages = {}
+    for c in reversed(cls.__mro__):
+        messages.update(getattr(c, 'default_error_messages', {}))
+    return messages
+
+
+# The merged default messages of each class, used when pickling.
+# Classes are weakly referenced, so classes made on the fly are not kept alive.
+pickled_error_messages = weakref.WeakKeyDictionary()
+
+
 class ErrorMessageMixin(DeepCopyable):
     default_error_messages = {}
 
     def __init__(self, error_messages=None, **kwargs):
         super().__init__(**kwargs)
 
-        messages = {}
-        for c in reversed(self.__class__.__mro__):
-            messages.update(getattr(c, 'default_error_messages', {}))
+        messages = class_error_messages(self.__class__)
         messages.update(error_messages or {})
         self.error_messages = messages
 
@@ -40,3 +61,29 @@ class ErrorMessageMixin(DeepCopyable):
         obj = super().__deepcopy__(memo)
         obj.error_messages = dict(self.error_messages)
         return obj
+
+    def __getstate__(self):
+        # Only the messages that differ from the class defaults are pickled.
+        # The rest are taken from the class again when unpickling.
+        state = self.__dict__.copy()
+        messages = state.pop('error_messages')
+        # A cached copy of the defaults is only used to leave messages out.
+        # If the class defaults have changed since, the changed messages
+        # are pickled, and unpickling merges the current defaults again.
+        cls = self.__class__
+        try:
+            defaults = pickled_error_messages[cls]
+        except KeyError:
+            defaults = pickled_error_messages[cls] = class_error_messages(cls)
+        if messages != defaults:
+            state['error_messages'] = {
+                code: message for code, message in messages.items()
+                if defaults.get(code) is not message}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        messages = class_error_messages(self.__class__)
+        if 'error_messages' in state:
+            messages.update(state['error_messages'])
+        self.error_messages = messages
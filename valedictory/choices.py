@@ -0,0 +1,122 @@
+"""
+Choice sets for :class:`~valedictory.fields.ChoiceField`
+and :class:`~valedictory.fields.ChoiceMapField`
+that can be shared between many fields and validators.
+"""
+
+import collections.abc
+import functools
+import threading
+import types
+
+#: Choice collections that can not be modified,
+#: and so can be shared between fields instead of being copied.
+immutable_types = (frozenset, types.MappingProxyType)
+
+
+def freeze(choices):
+    """
+    Make an immutable copy of some choices, suitable for sharing.
+    Mappings become a read-only ``types.MappingProxyType``,
+    while any other iterable becomes a ``frozenset``.
+    Choices that are already immutable are returned as is.
+    """
+    if isinstance(choices, immutable_types):
+        return choices
+    if isinstance(choices, collections.abc.Mapping):
+        return types.MappingProxyType(dict(choices))
+    return frozenset(choices)
+
+
+class LazyChoices:
+    """
+    A set or mapping of choices that is only loaded when it is first used.
+    This is useful for very large sets of choices,
+    such as a list of product codes or post codes.
+
+    ``loader`` is a callable that returns the choices.
+    It is called the first time the choices are needed,
+    and the (immutable) result is shared by every field using this instance,
+    including all copies of those fields made for each validator.
+
+    .. code:: python
+
+        skus = LazyChoices(load_skus_from_database)
+
+        class OrderValidator(Validator):
+            sku = ChoiceField(skus)
+
+    .. automethod:: from_file
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.choices = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, encoding='utf-8'):
+        """
+        Load a set of string choices from a file, one choice per line.
+        Leading and trailing whitespace is stripped, and blank lines are ignored.
+        """
+        return cls(functools.partial(read_lines, path, encoding))
+
+    @property
+    def loaded(self):
+        return self.choices is not None
+
+    def load(self):
+        """
+        Get the choices, loading them if they have not been loaded yet.
+        """
+        choices = self.choices
+        if choices is None:
+            with self.lock:
+                if self.choices is None:
+                    self.choices = freeze(self.loader())
+                choices = self.choices
+        return choices
+
+    def __contains__(self, value):
+        return value in self.load()
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        if self.loaded:
+            return '<{} ({} choices)>'.format(type(self).__name__, len(self.choices))
+        return '<{} (not loaded)>'.format(type(self).__name__)
+
+    def __getstate__(self):
+        # Only the loader is pickled. The choices are loaded again when
+        # they are first used after unpickling, as they may be very large.
+        return {'loader': self.loader}
+
+    def __setstate__(self, state):
+        self.__init__(state['loader'])
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def read_lines(path, encoding):
+    with open(path, 'r', encoding=encoding) as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+def is_shared(choices):
+    """
+    Can these choices be shared between copies of a field, instead of being copied?
+    """
+    return isinstance(choices, immutable_types + (LazyChoices,))
@@ -0,0 +1,155 @@
+"""
+Parse ISO 8601 date and time strings.
+
+The common, fully specified formats (``YYYY-MM-DD``,
+``YYYY-MM-DDTHH:MM:SS[.ffffff][Z|+HH:MM]``, ``HH:MM:SS[.ffffff][Z|+HH:MM]``,
+and ``YYYY-MM``) are parsed directly.
+Anything else is handed to :mod:`aniso8601`,
+so the results are the same as parsing everything with :mod:`aniso8601`,
+just faster for the formats seen most often.
+
+All parsers raise a ``ValueError`` (or a ``NotImplementedError``,
+for valid ISO 8601 strings :mod:`aniso8601` does not support)
+if the string can not be parsed.
+
+Parsed values with a UTC offset share one ``datetime.timezone`` instance
+per offset, rather than each value getting its own ``tzinfo``.
+"""
+
+import datetime
+import re
+
+import aniso8601
+
+date_re = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})\Z')
+
+time_re = re.compile(
+    r'([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{1,6}))?'
+    r'(?:(Z)|([+-])([0-9]{2}):([0-9]{2}))?\Z')
+
+datetime_re = re.compile(
+    r'([0-9]{4})-([0-9]{2})-([0-9]{2})T'
+    r'([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.([0-9]{1,6}))?'
+    r'(?:(Z)|([+-])([0-9]{2}):([0-9]{2}))?\Z')
+
+year_month_re = re.compile(r'([0-9]{4})-([0-9]{2})\Z')
+
+
+#: One shared ``datetime.timezone`` instance for each UTC offset seen.
+#: ISO 8601 offsets have minute precision and are less than a day,
+#: so this can hold at most a few thousand entries.
+timezones = {datetime.timedelta(0): datetime.timezone.utc}
+
+
+class FallbackRequired(Exception):
+    """
+    Raised by the fast parsers when a string matched the common format,
+    but needs :mod:`aniso8601` to decide how it should be handled.
+    """
+
+
+def canonical_timezone(offset):
+    """
+    Get the shared ``datetime.timezone`` instance for a UTC offset.
+    """
+    try:
+        return timezones[offset]
+    except KeyError:
+        return timezones.setdefault(offset, datetime.timezone(offset))
+
+
+def with_canonical_timezone(value):
+    if value.tzinfo is None:
+        return value
+    return value.replace(tzinfo=canonical_timezone(value.utcoffset()))
+
+
+def make_tzinfo(utc, sign, hours, minutes):
+    if utc:
+        return datetime.timezone.utc
+    if hours is None:
+        return None
+
+    offset = datetime.timedelta(hours=int(hours), minutes=int(minutes))
+    if sign == '-':
+        if not offset:
+            # aniso8601 rejects '-00:00'
+            raise FallbackRequired
+        offset = -offset
+    return canonical_timezone(offset)
+
+
+def make_microsecond(fraction):
+    if fraction is None:
+        return 0
+    return int(fraction.ljust(6, '0'))
+
+
+def parse_datetime(value):
+    """
+    Parse an ISO 8601 date time string, returning a ``datetime.datetime``.
+    """
+    match = datetime_re.match(value)
+    if match is not None:
+        (year, month, day, hour, minute, second, fraction,
+         utc, sign, tz_hours, tz_minutes) = match.groups()
+        try:
+            return datetime.datetime(
+                int(year), int(month), int(day),
+                int(hour), int(minute), int(second),
+                make_microsecond(fraction),
+                make_tzinfo(utc, sign, tz_hours, tz_minutes))
+        except (ValueError, FallbackRequired):
+            # Let aniso8601 deal with edge cases such as '24:00:00'
+            # and raise the appropriate error for invalid data.
+            pass
+
+    return with_canonical_timezone(aniso8601.parse_datetime(value))
+
+
+def parse_date(value):
+    """
+    Parse an ISO 8601 date string, returning a ``datetime.date``.
+    """
+    match = date_re.match(value)
+    if match is not None:
+        year, month, day = match.groups()
+        try:
+            return datetime.date(int(year), int(month), int(day))
+        except ValueError:
+            pass
+
+    return aniso8601.parse_date(value)
+
+
+def parse_time(value):
+    """
+    Parse an ISO 8601 time string, returning a ``datetime.time``.
+    """
+    match = time_re.match(value)
+    if match is not None:
+        (hour, minute, second, fraction,
+         utc, sign, tz_hours, tz_minutes) = match.groups()
+        try:
+            return datetime.time(
+                int(hour), int(minute), int(second),
+                make_microsecond(fraction),
+                make_tzinfo(utc, sign, tz_hours, tz_minutes))
+        except (ValueError, FallbackRequired):
+            pass
+
+    return with_canonical_timezone(aniso8601.parse_time(value))
+
+
+def parse_year_month(value):
+    """
+    Parse a ``YYYY-MM`` string, returning a tuple of ``(year, month)``.
+    """
+    match = year_month_re.match(value)
+    if match is not None:
+        year, month = int(match.group(1)), int(match.group(2))
+        if year >= 1 and 1 <= month <= 12:
+            return (year, month)
+
+    date = datetime.datetime.strptime(value, "%Y-%m").date()
+    return (date.year, date.month)
@@ -1,4 +1,8 @@
+import bisect
+import collections.abc
+import io
 from collections import defaultdict
+from json.encoder import encode_basestring as encode_string
 
 
 class BaseValidationException(Exception):
@@ -17,7 +21,11 @@ class InvalidDataException(BaseValidationException):
     .. autoattribute:: invalid_fields
         :annotation:
 
+    .. automethod:: add
     .. automethod:: flatten
+    .. automethod:: to_dict
+    .. automethod:: to_json
+    .. automethod:: walk
     """
 
     #: A dict with the validation exceptions for all fields that
@@ -35,6 +43,12 @@ class InvalidDataException(BaseValidationException):
         self.invalid_fields = defaultdict(list)
         self.invalid_fields.update(errors)
 
+    def add(self, name, error):
+        """
+        Add an error for the field ``name``.
+        """
+        self.invalid_fields[name].append(error)
+
     def __str__(self):
         inner = ', '.join('{0}: {1}'.format(k, v)
                           for k, v in self.invalid_fields.items())
@@ -54,6 +68,11 @@ class InvalidDataException(BaseValidationException):
     def __hash__(self):
         return id(self)
 
+    def __reduce__(self):
+        # The errors are pickled as a plain dict, without the defaultdict factory
+        state = {k: v for k, v in self.__dict__.items() if k != 'invalid_fields'}
+        return (type(self), (dict(self.invalid_fields),), state or None)
+
     def flatten(self):
         """
         Yield a pair of ``(path, errors)`` for each error.
@@ -81,13 +100,353 @@ class InvalidDataException(BaseValidationException):
             (['items', 2, 'quantity'], ['This must be equal to or greater than the minimum of 1']),
         ]
         """
-        for name, error_list in self.invalid_fields.items():
+        for path, error in self.walk(lambda path, name: path + (name,), ()):
+            yield path, error.msg
+
+    def to_dict(self, compact=False):
+        """
+        Get a dict mapping the path to each invalid field to a list of its errors.
+        Paths are JSON pointers (:rfc:`6901`),
+        and each error is a dict of its ``code`` and ``message``.
+        The result can be serialised as JSON.
+
+        If ``compact`` is ``True``, list items in a row with the same error
+        are reported once, with a path to the range of indexes,
+        such as ``/items/0..39999``.
+        Otherwise each item is reported separately.
+
+        >>> errors.to_dict()
+        {
+            '/name': [{'code': 'non_empty', 'message': 'This field can not be empty'}],
+            '/items/2/quantity': [{'code': 'min_value', 'message': '...'}],
+        }
+        """
+        result = {}
+        for pointer, error in self.walk(json_pointer, '', compact=compact):
+            result.setdefault(pointer, []).append(
+                {'code': error.code, 'message': str(error.msg)})
+        return result
+
+    def to_json(self, fp=None, compact=False):
+        """
+        Serialise :meth:`to_dict` as JSON,
+        writing the JSON straight to a buffer rather than building the dict first.
+        If ``fp`` is given, the JSON is written to it,
+        otherwise the JSON is returned as a string.
+        """
+        buffer = io.StringIO() if fp is None else fp
+        write = buffer.write
+
+        separator = '{'
+        last_pointer = None
+        for pointer, error in self.walk(json_pointer, '', compact=compact):
+            if pointer != last_pointer:
+                if last_pointer is not None:
+                    separator = '], '
+                write(separator + encode_string(pointer) + ': [')
+                last_pointer = pointer
+            else:
+                write(', ')
+            code = 'null' if error.code is None else encode_string(error.code)
+            write('{"code": %s, "message": %s}' % (code, encode_string(str(error.msg))))
+        write('{}' if last_pointer is None else ']}')
+
+        if fp is None:
+            return buffer.getvalue()
+
+    def walk(self, join, root, compact=False):
+        """
+        Yield a pair of ``(path, error)`` for each
+        :exc:`ValidationException` in these errors, and any nested errors.
+        The path to each field is made by calling ``join(path, name)``
+        with the path to its parent, starting with ``root``.
+        Each path is only made once, no matter how many errors it has.
+
+        The errors are walked using a stack, rather than recursively,
+        so any depth of nesting can be walked.
+
+        If ``compact`` is ``True``, runs of list items with the same error
+        are yielded once, with an :class:`IndexRange` as the name.
+        """
+        def field_items(errors):
+            if compact and isinstance(errors.invalid_fields, IndexedErrors):
+                return errors.invalid_fields.compact_items()
+            return iter(errors.invalid_fields.items())
+
+        stack = [(root, field_items(self))]
+        while stack:
+            path, items = stack[-1]
+            for name, error_list in items:
+                field_path = join(path, name)
+                nested = None
+                for error in error_list:
+                    if isinstance(error, InvalidDataException):
+                        if nested is None:
+                            nested = []
+                        nested.append(error)
+                    else:
+                        yield field_path, error
+                if nested is not None:
+                    # Walk the nested errors before the rest of the fields
+                    for error in reversed(nested):
+                        stack.append((field_path, field_items(error)))
+                    break
+            else:
+                stack.pop()
+
+
+class ListErrors(InvalidDataException):
+    """
+    The errors for the items in a list, keyed by index.
+
+    When many items in a row have the same error,
+    such as thousands of items of the wrong type,
+    the error is only stored once for the whole run of items,
+    rather than once for each item.
+    The errors still behave as if each item had its own entry:
+    :attr:`invalid_fields` gives each index its own list of errors,
+    adding an empty list for an index with no errors,
+    :meth:`flatten` yields each item, and a :class:`ListErrors`
+    is equal to an :class:`InvalidDataException` with the same errors.
+    Use ``compact=True`` with :meth:`to_dict` or :meth:`to_json`
+    to report each run once.
+    """
+    def __init__(self, errors={}):
+        super(BaseValidationException, self).__init__()
+        self.invalid_fields = IndexedErrors()
+        for index, error_list in sorted(errors.items()):
             for error in error_list:
-                if isinstance(error, InvalidDataException):
-                    for nested_name, nested_error in error.flatten():
-                        yield (name,) + nested_name, nested_error
+                self.add(index, error)
+
+    def add(self, index, error):
+        self.invalid_fields.add(index, error)
+
+    def __reduce__(self):
+        # The runs of errors are pickled as they are, rather than one entry per index
+        return (type(self), (), self.__dict__.copy())
+
+    def __str__(self):
+        inner = ', '.join('{0}: {1}'.format(k, v)
+                          for k, v in self.invalid_fields.compact_items())
+        return '{' + inner + '}'
+
+
+class IndexRange:
+    """
+    A run of list indexes, from ``start`` up to but not including ``stop``.
+    Shown as ``start..last``, such as ``0..39999``.
+    """
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self):
+        return iter(range(self.start, self.stop))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __str__(self):
+        return '{}..{}'.format(self.start, self.stop - 1)
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self)
+
+    def __eq__(self, other):
+        if not isinstance(other, IndexRange):
+            return NotImplemented
+        return (self.start, self.stop) == (other.start, other.stop)
+
+    def __hash__(self):
+        return hash((self.start, self.stop))
+
+
+def same_error(a, b):
+    return (
+        type(a) is type(b) and isinstance(a, ValidationException)
+        and a.code == b.code and a.msg == b.msg)
+
+
+class IndexedErrors(collections.abc.MutableMapping):
+    """
+    A mapping of list indexes to the errors for that item,
+    used by :class:`ListErrors`.
+    Errors are stored as runs of ``[start, stop, errors]``, sorted by index,
+    where every index in the run has the same list of errors.
+
+    Like a ``defaultdict(list)``, getting the errors for an index gives
+    a list that belongs to that index alone, which can be changed,
+    and getting an index with no errors adds an empty list for it.
+    The run holding the index is split to give it its own list.
+    Iterating over :meth:`items` or :meth:`values` does not split the runs,
+    so the lists it gives for a run of many items should not be changed.
+    Prefer :meth:`add` to add errors.
+    """
+    def __init__(self):
+        self.runs = []
+        self.starts = []
+        #: The indexes whose lists have been handed out,
+        #: which can not be joined in to a run with other items.
+        self.pinned = set()
+
+    def add(self, index, error):
+        runs = self.runs
+        position = bisect.bisect_right(self.starts, index)
+        if position:
+            run = runs[position - 1]
+            start, stop, errors = run
+            if index < stop:
+                # This item already has errors
+                if stop - start == 1:
+                    errors.append(error)
                 else:
-                    yield (name,), error.msg
+                    self.split(position - 1, index)
+                    self.add(index, error)
+                return
+            if index == stop and len(errors) == 1 and same_error(errors[0], error) \
+                    and start not in self.pinned:
+                run[1] = stop + 1
+                return
+
+        runs.insert(position, [index, index + 1, [error]])
+        self.starts.insert(position, index)
+
+    def split(self, position, index):
+        """
+        Split a run so that ``index`` is a run by itself.
+        """
+        start, stop, errors = self.runs[position]
+        runs = [
+            [run_start, run_stop, list(errors)]
+            for run_start, run_stop in [(start, index), (index, index + 1), (index + 1, stop)]
+            if run_start < run_stop]
+        self.runs[position:position + 1] = runs
+        self.starts[position:position + 1] = [run[0] for run in runs]
+
+    def find(self, index):
+        """
+        Get the position of the run holding ``index``, or ``None``.
+        """
+        position = bisect.bisect_right(self.starts, index)
+        if position and index < self.runs[position - 1][1]:
+            return position - 1
+        return None
+
+    def compact_items(self):
+        """
+        Yield ``(index, errors)`` for each run of one item,
+        and ``(IndexRange, errors)`` for each longer run.
+        """
+        for start, stop, errors in self.runs:
+            if stop - start == 1:
+                yield start, errors
+            else:
+                yield IndexRange(start, stop), errors
+
+    def __getitem__(self, index):
+        position = self.find(index)
+        if position is None:
+            self[index] = []
+        else:
+            start, stop, errors = self.runs[position]
+            if stop - start > 1:
+                self.split(position, index)
+            self.pinned.add(index)
+        return self.runs[self.find(index)][2]
+
+    def __setitem__(self, index, errors):
+        position = self.find(index)
+        if position is None:
+            position = bisect.bisect_right(self.starts, index)
+            self.runs.insert(position, [index, index + 1, errors])
+            self.starts.insert(position, index)
+        else:
+            start, stop, old_errors = self.runs[position]
+            if stop - start > 1:
+                self.split(position, index)
+                position = self.find(index)
+            self.runs[position][2] = errors
+        self.pinned.add(index)
+
+    def __delitem__(self, index):
+        position = self.find(index)
+        if position is None:
+            raise KeyError(index)
+        start, stop, errors = self.runs[position]
+        if stop - start > 1:
+            self.split(position, index)
+            position = self.find(index)
+        del self.runs[position]
+        del self.starts[position]
+        self.pinned.discard(index)
+
+    def __contains__(self, index):
+        return self.find(index) is not None
+
+    def get(self, index, default=None):
+        if index in self:
+            return self[index]
+        return default
+
+    def __iter__(self):
+        for start, stop, errors in self.runs:
+            yield from range(start, stop)
+
+    def __len__(self):
+        return sum(stop - start for start, stop, errors in self.runs)
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    def items(self):
+        return IndexedErrorsItems(self)
+
+    def values(self):
+        return IndexedErrorsValues(self)
+
+    def __getstate__(self):
+        return self.runs
+
+    def __setstate__(self, runs):
+        self.runs = runs
+        self.starts = [run[0] for run in runs]
+        self.pinned = set()
+
+    def __repr__(self):
+        return '<{} {{{}}}>'.format(type(self).__name__, ', '.join(
+            '{}: {!r}'.format(k, v) for k, v in self.compact_items()))
+
+
+class IndexedErrorsItems(collections.abc.ItemsView):
+    def __iter__(self):
+        for start, stop, errors in self._mapping.runs:
+            for index in range(start, stop):
+                yield index, errors
+
+    def __contains__(self, item):
+        index, errors = item
+        position = self._mapping.find(index)
+        return position is not None and self._mapping.runs[position][2] == errors
+
+
+class IndexedErrorsValues(collections.abc.ValuesView):
+    def __iter__(self):
+        for start, stop, errors in self._mapping.runs:
+            for index in range(start, stop):
+                yield errors
+
+    def __contains__(self, errors):
+        return any(run[2] == errors for run in self._mapping.runs)
+
+
+def json_pointer(path, name):
+    """
+    Add ``name`` to the end of a JSON pointer.
+    """
+    name = str(name)
+    if '~' in name or '/' in name:
+        name = name.replace('~', '~0').replace('/', '~1')
+    return path + '/' + name
 
 
 class ValidationException(BaseValidationException):
@@ -130,6 +489,10 @@ class ValidationException(BaseValidationException):
     def __hash__(self):
         return hash(self.code)
 
+    def __reduce__(self):
+        state = {k: v for k, v in self.__dict__.items() if k not in ('msg', 'code')}
+        return (type(self), (self.msg, self.code), state or None)
+
 
 class NoData(BaseValidationException):
     """
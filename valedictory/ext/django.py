@@ -1,42 +1,455 @@
 """
-Fields that integrate with Django.
+Fields that integrate with Django,
+and tools to check the database queries they make.
 """
 
+import asyncio
+import collections
+import collections.abc
+import contextlib
 import copy
+import functools
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
 
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
 from django.core.validators import URLValidator
+from django.db import connections, transaction
 from django.db.models import Model
-from django.utils.translation import ugettext_lazy as _
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
 
-from valedictory import fields
+from valedictory import fields, scope
+from valedictory.exceptions import (
+    BaseValidationException, InvalidDataException, ListErrors)
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:  # Django < 3.0
+    sync_to_async = None
+
+
+#: The first bytes of files of some common types,
+#: used by :class:`UploadedFileField` to check files are the type they claim to be.
+file_signatures = {
+    'application/gzip': (b'\x1f\x8b',),
+    'application/pdf': (b'%PDF-',),
+    'application/zip': (b'PK\x03\x04', b'PK\x05\x06'),
+    'image/bmp': (b'BM',),
+    'image/gif': (b'GIF87a', b'GIF89a'),
+    'image/jpeg': (b'\xff\xd8\xff',),
+    'image/png': (b'\x89PNG\r\n\x1a\n',),
+    'image/tiff': (b'II*\x00', b'MM\x00*'),
+}
 
 
 class UploadedFileField(fields.TypedField):
     """
-    Accepts uploaded files
+    Accepts uploaded files.
+
+    The size and type of the file can be checked,
+    and a checksum of the contents can be computed.
+    Files are read in chunks using ``UploadedFile.chunks()``,
+    so large files are never read in to memory all at once.
+    Files that declare a size larger than :attr:`max_size`
+    are rejected without being read at all.
+
+    .. code:: python
+
+        class DocumentValidator(Validator):
+            scan = UploadedFileField(
+                max_size=200 * 1024 * 1024,
+                content_types=['application/pdf', 'image/png'],
+                checksum='sha256')
+
+    The file is returned after it is cleaned,
+    with its position reset to the start of the file.
+
+    .. autoattribute:: max_size
+
+    .. autoattribute:: content_types
+        :annotation:
+
+    .. autoattribute:: signatures
+        :annotation:
+
+    .. autoattribute:: checksum
+        :annotation:
+
+    .. autoattribute:: chunk_size
+        :annotation:
+
+    .. autoattribute:: default_error_messages
+        :annotation:
     """
     required_types = UploadedFile
     type_name = 'file'
 
+    #: The maximum size of the file in bytes.
+    #: Defaults to no maximum.
+    max_size = float('inf')
+
+    #: The content types allowed, such as ``'image/png'``.
+    #: The content type is the one the client sent with the file.
+    #: If the type has an entry in :attr:`signatures`,
+    #: the start of the file must match one of the signatures.
+    #: Defaults to ``None``, which allows files of any type.
+    content_types = None
+
+    #: A dict mapping content types to a tuple of the bytes
+    #: files of that type start with.
+    #: Defaults to :data:`file_signatures`.
+    signatures = file_signatures
+
+    #: The name of a :mod:`hashlib` algorithm, such as ``'sha256'``.
+    #: If set, the hex digest of the file contents is computed while
+    #: the file is read, and set as the ``checksum`` attribute of the file.
+    #: Defaults to ``None``, which does not compute a checksum.
+    checksum = None
+
+    #: The number of bytes to read at once.
+    #: Defaults to ``None``, which uses the default chunk size of the file.
+    chunk_size = None
+
+    #:
+    #: max_size
+    #:     Raised when the file is larger than :attr:`max_size`.
+    #:
+    #: content_type
+    #:     Raised when the type of the file is not one of :attr:`content_types`.
+    #:
+    #: signature
+    #:     Raised when the contents of the file do not match its type.
+    default_error_messages = {
+        'max_size': _("Maximum file size is {max} bytes"),
+        'content_type': _("Files of type {content_type} are not allowed"),
+        'signature': _("The file contents do not match the type {content_type}"),
+    }
+
+    def __init__(self, max_size=None, content_types=None, signatures=None,
+                 checksum=None, chunk_size=None, **kwargs):
+        """
+        Construct a new UploadedFileField
+
+        In addition to the arguments accepted by the ``Field`` class, the
+        following arguments are accepted:
+
+        * ``max_size`` is the maximum file size in bytes.
+        * ``content_types`` is a list of the allowed content types.
+        * ``signatures`` sets :attr:`signatures`.
+        * ``checksum`` is the name of the hash algorithm to compute a checksum with.
+        * ``chunk_size`` is the number of bytes to read at once.
+        """
+        super(UploadedFileField, self).__init__(**kwargs)
+
+        if max_size is not None:
+            self.max_size = max_size
+        if content_types is not None:
+            self.content_types = frozenset(content_types)
+        if signatures is not None:
+            self.signatures = signatures
+        if checksum is not None:
+            # Fail early for unknown algorithms
+            hashlib.new(checksum)
+            self.checksum = checksum
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+
+    def clean(self, data):
+        value = super(UploadedFileField, self).clean(data)
+
+        if value.size is not None and value.size > self.max_size:
+            raise self.error('max_size', {'max': self.max_size})
+
+        content_type = value.content_type
+        signatures = ()
+        if self.content_types is not None:
+            if content_type not in self.content_types:
+                raise self.error('content_type', {'content_type': content_type})
+            signatures = tuple(self.signatures.get(content_type, ()))
+        header_size = max(map(len, signatures), default=0)
+
+        header = b''
+        if self.checksum is not None or (value.size is None and self.max_size < float('inf')):
+            header = self.read_chunks(value, header_size)
+        elif header_size:
+            value.seek(0)
+            header = value.read(header_size)
+            value.seek(0)
+
+        if signatures and not header.startswith(signatures):
+            raise self.error('signature', {'content_type': content_type})
+
+        return value
+
+    def read_chunks(self, value, header_size):
+        """
+        Read the whole file a chunk at a time, checking its size
+        and computing the :attr:`checksum`.
+        Returns the first ``header_size`` bytes of the file.
+        """
+        digest = None if self.checksum is None else hashlib.new(self.checksum)
+        header = b''
+        size = 0
+        try:
+            for chunk in value.chunks(self.chunk_size):
+                if len(header) < header_size:
+                    header += chunk[:header_size - len(header)]
+                size += len(chunk)
+                if size > self.max_size:
+                    raise self.error('max_size', {'max': self.max_size})
+                if digest is not None:
+                    digest.update(chunk)
+        finally:
+            value.seek(0)
+
+        if digest is not None:
+            value.checksum = digest.hexdigest()
+        return header
+
+
+class LookupCache:
+    """
+    A cache of the objects found by a :class:`ForeignKeyField`,
+    shared between calls to :meth:`~valedictory.Validator.clean`.
+    This is useful for reference tables that are read often
+    but rarely change.
+
+    .. code:: python
+
+        country_cache = LookupCache(max_size=500, ttl=3600)
+
+        class AddressValidator(Validator):
+            country = ForeignKeyField(
+                Country.objects.all(), field='code', key_type=str,
+                cache=country_cache)
+
+    Once ``max_size`` objects are cached,
+    the least recently used object is dropped to make room for the next.
+    Objects are dropped ``ttl`` seconds after they are cached.
+    If ``ttl`` is ``None``, objects only leave the cache to make room for
+    others, or when they are invalidated.
+
+    The same model instance is returned every time a cached key is cleaned,
+    so the instances should not be modified.
+    Use a separate cache for each :class:`ForeignKeyField` with
+    a different queryset.
+
+    .. autoattribute:: hits
+        :annotation:
+
+    .. autoattribute:: misses
+        :annotation:
+
+    .. automethod:: invalidate
+    .. automethod:: clear
+    """
+
+    #: The number of keys found in the cache.
+    hits = 0
+
+    #: The number of keys not found in the cache.
+    misses = 0
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get the object cached for ``key``, or ``None`` if it is not cached.
+        """
+        with self.lock:
+            try:
+                expires, value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires is not None and expires <= time.monotonic():
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Cache ``value`` for ``key``.
+        """
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Drop the object for ``key`` from the cache,
+        for example when it has been changed or deleted.
+        Keys for :class:`ForeignKeyField` are ``(field, key)`` tuples,
+        such as ``('pk', 10)`` or ``('code', 'AU')``.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drop everything from the cache, and reset the statistics.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self):
+        """
+        A dict of the ``hits``, ``misses``, and current ``size`` of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        # Cached objects are not pickled, so an unpickled cache starts empty
+        return {'max_size': self.max_size, 'ttl': self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
 
 class ForeignKeyField(fields.TypedField):
     """
     Accepts foreign keys to a Django model, and returns the model instance when
     cleaned.
 
+    When used in a :class:`~valedictory.fields.ListField`,
+    all the keys in the list are looked up together in one query
+    (or a few queries, for lists longer than the database allows parameters),
+    instead of one query per key.
+
+    Each key is only looked up once while cleaning the data passed to
+    :meth:`~valedictory.Validator.clean`,
+    even if it appears many times in the data,
+    such as many line items in an order referencing the same product.
+
+    When cleaned with :meth:`~valedictory.Validator.aclean`,
+    objects are looked up without blocking the event loop.
+    On Django 4.1 and later the querysets are iterated with ``async for``,
+    using Django's async queryset API;
+    older versions run the query in a worker thread with ``sync_to_async``.
+
+    The ``select_related``, ``prefetch_related``, ``only``, and ``defer``
+    options are applied to the queryset for every lookup,
+    so the objects returned have exactly the data the caller needs:
+
+    .. code:: python
+
+        class OrderLineValidator(Validator):
+            product = ForeignKeyField(
+                Product.objects.all(),
+                select_related=['brand'], only=['name', 'price', 'brand__name'])
+
+    .. autoattribute:: cache
+        :annotation:
+
+    .. autoattribute:: return_instance
+
+    .. autoattribute:: using
+        :annotation:
+
+    .. autoattribute:: select_related
+        :annotation:
+
+    .. autoattribute:: prefetch_related
+        :annotation:
+
+    .. autoattribute:: only
+        :annotation:
+
+    .. autoattribute:: defer
+        :annotation:
+
     .. autoattribute:: default_error_messages
         :annotation:
+
+    .. automethod:: clean_many
+    .. automethod:: aclean_many
+    .. automethod:: get_queryset
     """
     type_name = 'foreign key'
 
+    # Lists of keys are looked up together, in one query
+    clean_in_batches = True
+
+    # Lookups are made in the calling thread, using its database connection,
+    # so they see the rows of any transaction it is in
+    clean_in_executor = False
+
+    #: A :class:`LookupCache` to cache the objects found between calls to
+    #: :meth:`~valedictory.Validator.clean`. Defaults to no cache.
+    cache = None
+
+    #: If the model instance should be returned.
+    #: If ``False``, the field only checks that an object exists for the key,
+    #: and returns the key instead.
+    #: This is much cheaper than making model instances, for example when
+    #: only the key is needed to be saved as a foreign key.
+    #: :attr:`select_related`, :attr:`prefetch_related`, :attr:`only`,
+    #: and :attr:`defer` are not used when this is ``False``.
+    return_instance = True
+
+    #: The alias of the database to look up objects in,
+    #: such as a read replica.
+    #: Lookups only read from the database, so a replica is safe to use
+    #: as long as it is not too far behind the primary.
+    #: Defaults to ``None``, which uses the database the queryset would use,
+    #: as chosen by the ``db_for_read()`` method of any database routers.
+    using = None
+
+    #: Related objects to fetch in the same query,
+    #: passed to ``QuerySet.select_related()``.
+    select_related = ()
+
+    #: Related objects to fetch after the objects are found,
+    #: passed to ``QuerySet.prefetch_related()``.
+    #: This takes one extra query for each relation, no matter how many objects are found.
+    prefetch_related = ()
+
+    #: Only fetch these fields of the model, passed to ``QuerySet.only()``.
+    #: The field being searched on is always fetched.
+    only = ()
+
+    #: Do not fetch these fields of the model, passed to ``QuerySet.defer()``.
+    #: The field being searched on is always fetched.
+    defer = ()
+
     default_error_messages = {
         'missing': _("Object does not exist"),
         'multiple': _("Multiple objects returned"),
     }
 
-    def __init__(self, queryset, field='pk', key_type=int, **kwargs):
+    def __init__(self, queryset, field='pk', key_type=int, cache=None,
+                 return_instance=None, using=None, select_related=None,
+                 prefetch_related=None, only=None, defer=None, **kwargs):
         super(ForeignKeyField, self).__init__(**kwargs)
         """
         Construct a new ForeignKeyField
@@ -50,43 +463,974 @@ class ForeignKeyField(fields.TypedField):
           ``pk``.
         * ``key_type`` is the type of the field being searched. Defaults to
           ``int``
+        * ``cache`` is a :class:`LookupCache` to cache found objects in.
+        * ``return_instance`` sets :attr:`return_instance`.
+        * ``using`` is the alias of the database to look up objects in.
+        * ``select_related``, ``prefetch_related``, ``only``, and ``defer``
+          are lists of field names to apply to the queryset.
         """
-        if isinstance(queryset, Model):
-            queryset = queryset.objects.all()
+        if isinstance(queryset, type) and issubclass(queryset, Model):
+            queryset = queryset._default_manager.all()
+        # The queryset is shared between all copies of this field, and is
+        # never evaluated itself. Every lookup makes a new queryset from it
+        # using filter(), so a result cache is never used or copied.
         self.queryset = queryset
         self.field = field
         self.required_types = key_type
+        if cache is not None:
+            self.cache = cache
+        if return_instance is not None:
+            self.return_instance = return_instance
+        if using is not None:
+            self.using = using
+        if select_related is not None:
+            self.select_related = tuple(select_related)
+        if prefetch_related is not None:
+            self.prefetch_related = tuple(prefetch_related)
+        if only is not None:
+            self.only = tuple(only)
+        if defer is not None:
+            self.defer = tuple(defer)
 
     def clean(self, value):
-        value = super().clean(value)
-        queryset = self.queryset
-        model = queryset.model
+        key = self.prepare_key(super().clean(value))
+        return self.get_object(self.find(key))
+
+    async def aclean(self, value):
+        if type(self).clean is not ForeignKeyField.clean:
+            return await fields.call_blocking(self.clean, value)
+        key = self.prepare_key(super().clean(value))
+        return self.get_object(await self.afind(key))
+
+    def clean_many(self, data):
+        """
+        Clean a list of keys, looking up all the objects at once using
+        ``queryset.filter(field__in=keys)``.
+        Errors are reported for each index, the same as :meth:`clean`.
+        """
+        if type(self).clean is not ForeignKeyField.clean or '__' in self.field:
+            # Only plain fields on the model can be matched up with the keys
+            return super().clean_many(data)
+
+        errors = ListErrors()
+        keys = self.prepare_keys(data, errors)
+        found = self.find_many(set(keys.values()))
+        return self.collect_objects(keys, found, errors)
+
+    async def aclean_many(self, data):
+        """
+        Clean a list of keys from async code, the same as :meth:`clean_many`.
+        """
+        if type(self).clean is not ForeignKeyField.clean or '__' in self.field:
+            return await super().aclean_many(data)
+
+        errors = ListErrors()
+        keys = self.prepare_keys(data, errors)
+        found = await self.afind_many(set(keys.values()))
+        return self.collect_objects(keys, found, errors)
+
+    def prepare_keys(self, data, errors):
+        """
+        Check the type of each key, and convert it to the Python value
+        of the model field, so it can be matched up with the objects found.
+        Returns a dict mapping each valid index to its key.
+        """
+        keys = {}
+        for i, datum in enumerate(data):
+            try:
+                keys[i] = self.prepare_key(super().clean(datum))
+            except BaseValidationException as err:
+                errors.add(i, err)
+        return keys
+
+    def prepare_key(self, key):
+        """
+        Convert a key to the Python value of the model field,
+        so that the same key is always stored and found the same way,
+        whether it is cleaned by itself or in a list.
+        Keys the model field does not accept can not match any object.
+        """
+        if '__' in self.field:
+            # Lookups across relations are passed to the database as they are
+            return key
         try:
-            return queryset.get(**{self.field: value})
-        except model.DoesNotExist:
+            return self.get_model_field().to_python(key)
+        except ValidationError:
+            raise self.error('missing')
+
+    def collect_objects(self, keys, found, errors):
+        cleaned_list = []
+        for i, key in keys.items():
+            try:
+                cleaned_list.append(self.get_object(found[key]))
+            except BaseValidationException as err:
+                errors.add(i, err)
+
+        if errors:
+            raise errors
+        return cleaned_list
+
+    def get_object(self, found):
+        """
+        Get the object from a list of the objects found for a key,
+        raising an error if there is not exactly one object.
+        """
+        if len(found) == 1:
+            return found[0]
+        elif not found:
             raise self.error('missing')
-        except model.MultipleObjectsReturned:
+        else:
             raise self.error('multiple')
 
-    def __deepcopy__(self, memo):
-        obj = super(ForeignKeyField, self).__deepcopy__(memo)
-        obj.queryset = copy.deepcopy(obj.queryset, memo)
-        return obj
+    def find(self, key):
+        """
+        Find the objects for a key, using the :attr:`cache` and the objects
+        already found while cleaning the current data where possible.
+        Returns a list of the objects found.
+        """
+        results, remaining = self.find_known([key])
+        if remaining:
+            return self.remember(remaining, {key: self.lookup(key)})[key]
+        return results[key]
+
+    async def afind(self, key):
+        results, remaining = self.find_known([key])
+        if remaining:
+            return self.remember(remaining, {key: await self.alookup(key)})[key]
+        return results[key]
+
+    def find_many(self, keys):
+        """
+        Find the objects for many keys, the same as :meth:`find`,
+        looking up all the keys that are not cached at once.
+        Returns a dict mapping each key to a list of the objects found.
+        """
+        results, remaining = self.find_known(keys)
+        results.update(self.remember(remaining, self.lookup_many(remaining)))
+        return results
+
+    async def afind_many(self, keys):
+        results, remaining = self.find_known(keys)
+        results.update(self.remember(remaining, await self.alookup_many(remaining)))
+        return results
+
+    def find_known(self, keys):
+        """
+        Find the objects for the keys that have already been found,
+        either while cleaning the current data or in the :attr:`cache`.
+        Returns a dict mapping each of these keys to a list of the objects found,
+        and a list of the keys that need to be looked up.
+        """
+        identity_map = scope.get(self)
+        results = {}
+        remaining = []
+        for key in keys:
+            if identity_map is not None and key in identity_map:
+                results[key] = identity_map[key]
+                continue
+            found = self.get_cached(key)
+            if found is None:
+                remaining.append(key)
+            else:
+                results[key] = found
+            if identity_map is not None and found is not None:
+                identity_map[key] = found
+        return results, remaining
+
+    def remember(self, keys, objects):
+        """
+        Store the objects looked up for some keys,
+        so they are not looked up again.
+        Returns a dict mapping each key to a list of the objects found.
+        """
+        identity_map = scope.get(self)
+        results = {}
+        for key in keys:
+            found = results[key] = objects.get(key, [])
+            self.set_cached(key, found)
+            if identity_map is not None:
+                identity_map[key] = found
+        return results
+
+    def get_cached(self, key):
+        if self.cache is None:
+            return None
+        obj = self.cache.get((self.field, key))
+        if obj is None:
+            return None
+        return [obj]
+
+    def set_cached(self, key, found):
+        # Only objects that were found are cached. Missing objects could be
+        # created at any moment, so they are looked up every time.
+        if self.cache is not None and len(found) == 1:
+            self.cache.set((self.field, key), found[0])
+
+    def get_model_field(self):
+        opts = self.queryset.model._meta
+        if self.field == 'pk':
+            return opts.pk
+        return opts.get_field(self.field)
+
+    def get_queryset(self):
+        """
+        Get the queryset to look up objects in.
+        The queryset uses the :attr:`using` database,
+        and has the :attr:`select_related`, :attr:`prefetch_related`,
+        :attr:`only`, and :attr:`defer` options applied.
+        If :attr:`return_instance` is ``False``,
+        the queryset returns only the values of the field being searched on.
+        """
+        queryset = self.queryset
+        if self.using is not None:
+            queryset = queryset.using(self.using)
+
+        if not self.return_instance:
+            return queryset.values_list(self.field, flat=True)
+
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+
+        # The field being searched on is needed to match the objects found
+        # to the keys, and fetching it later would take another query.
+        field = self.field.split('__')[0]
+        if self.only:
+            queryset = queryset.only(*(self.only + (field,)))
+        if self.defer:
+            queryset = queryset.defer(*(name for name in self.defer if name != field))
+        return queryset
+
+    def lookup(self, key):
+        """
+        Look up the objects matching ``key`` in the database.
+        Returns a list of the objects found,
+        or of their keys if :attr:`return_instance` is ``False``.
+        Only two objects are fetched, as that is enough to know there are too many.
+        """
+        try:
+            queryset = self.get_queryset().filter(**{self.field: key})
+        except ValidationError:
+            # A key the field being searched on can not accept
+            return []
+        return list(queryset[:2])
+
+    async def alookup(self, key):
+        try:
+            queryset = self.get_queryset().filter(**{self.field: key})
+        except ValidationError:
+            return []
+        return await self.aevaluate(queryset[:2])
+
+    def lookup_many(self, keys):
+        """
+        Look up all objects matching any of ``keys`` in the database.
+        Returns a dict mapping each key to a list of the objects found,
+        or of their keys if :attr:`return_instance` is ``False``.
+        Keys with no matching objects are not in the dict.
+        """
+        objects = {}
+        for queryset in self.batch_querysets(keys):
+            self.group_by_key(queryset, objects)
+        return objects
+
+    async def alookup_many(self, keys):
+        objects = {}
+        for queryset in self.batch_querysets(keys):
+            self.group_by_key(await self.aevaluate(queryset), objects)
+        return objects
+
+    def batch_querysets(self, keys):
+        """
+        Make querysets to look up all of ``keys``, split in to as few batches
+        as the database allows parameters in one query.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+
+        queryset = self.get_queryset()
+        batch_size = connections[queryset.db].features.max_query_params or len(keys)
+        return [
+            queryset.filter(**{self.field + '__in': keys[start:start + batch_size]})
+            for start in range(0, len(keys), batch_size)]
+
+    def group_by_key(self, found, objects):
+        if self.return_instance:
+            get_key = self.get_model_field().value_from_object
+        else:
+            get_key = None
+
+        for obj in found:
+            key = obj if get_key is None else get_key(obj)
+            objects.setdefault(key, []).append(obj)
+
+    async def aevaluate(self, queryset):
+        """
+        Evaluate a queryset without blocking the event loop,
+        returning a list of the results.
+        """
+        # Django 4.1 added async iteration of querysets,
+        # but not with prefetch_related until Django 5.0
+        if hasattr(queryset, '__aiter__') and not (
+                self.return_instance and self.prefetch_related):
+            results = []
+            async for obj in queryset:
+                results.append(obj)
+            return results
+
+        if sync_to_async is not None:
+            return await sync_to_async(list)(queryset)
+        return list(queryset)
+
+    def __getstate__(self):
+        # Pickling a queryset evaluates it, fetching every row in the table.
+        # Only the query is pickled instead, as the Django docs suggest,
+        # along with the database, hints and prefetch lookups of the queryset.
+        state = super().__getstate__()
+        queryset = state.pop('queryset')
+        state['queryset'] = {
+            'model': queryset.model,
+            'query': queryset.query,
+            'using': queryset.db,
+            'hints': getattr(queryset, '_hints', {}),
+            'prefetch_related': getattr(queryset, '_prefetch_related_lookups', ()),
+        }
+        return state
+
+    def __setstate__(self, state):
+        pickled = state.pop('queryset')
+        super().__setstate__(state)
+        manager = pickled['model']._default_manager.db_manager(
+            pickled['using'], hints=pickled['hints'])
+        queryset = manager.all()
+        queryset.query = pickled['query']
+        if pickled['prefetch_related']:
+            queryset = queryset.prefetch_related(*pickled['prefetch_related'])
+        self.queryset = queryset
 
 
 class URLField(fields.StringField):
     """
     Accepts a URL as a string.
+
+    URLs are checked with Django's ``URLValidator``.
+    Before that, some cheap checks reject strings that are clearly not URLs,
+    such as strings without an allowed scheme, or containing whitespace,
+    without running the much slower ``URLValidator`` regex.
+
+    .. autoattribute:: cache
+        :annotation:
     """
     validator = URLValidator()
     default_error_messages = {
         'invalid_url': _("Invalid URL"),
     }
 
+    #: A :class:`LookupCache` of URLs already found to be valid,
+    #: which are not checked again.
+    #: This is useful when the same URLs are submitted over and over.
+    #: Defaults to no cache.
+    cache = None
+
+    whitespace_re = re.compile(r'\s')
+    authority_re = re.compile(r'[^/?#]*')
+
+    def __init__(self, cache=None, **kwargs):
+        super().__init__(**kwargs)
+        if cache is not None:
+            self.cache = cache
+
     def clean(self, value):
         value = super().clean(value)
+        if self.cache is not None and self.cache.get(value) is not None:
+            return value
+
+        if not self.is_possible_url(value):
+            raise self.error('invalid_url')
         try:
             self.validator(value)
         except ValidationError:
             raise self.error('invalid_url')
+
+        if self.cache is not None:
+            self.cache.set(value, True)
         return value
+
+    def is_possible_url(self, value):
+        """
+        Check for problems that ``URLValidator`` would reject a URL for.
+        This never rejects a URL that ``URLValidator`` would accept.
+        """
+        max_length = getattr(self.validator, 'max_length', None)
+        if max_length is not None and len(value) > max_length:
+            return False
+
+        scheme, separator, rest = value.partition('://')
+        if not separator or scheme.lower() not in self.validator.schemes:
+            return False
+        if self.whitespace_re.search(value):
+            return False
+
+        # There must be a host name, after any user name and before any port
+        authority = self.authority_re.match(rest).group()
+        host = authority.rpartition('@')[2]
+        if not host.startswith('['):
+            host = host.partition(':')[0]
+        return bool(host)
+
+
+class FormData(collections.abc.Mapping):
+    """
+    Form data, such as ``request.POST`` and ``request.FILES``,
+    arranged to be cleaned by a validator.
+    Fields that are a :class:`~valedictory.fields.ListField` get all the values
+    submitted for them using ``getlist()``,
+    while all other fields get the last value submitted.
+
+    .. code:: python
+
+        cleaned_data = validator.clean(FormData(validator, request.POST, request.FILES))
+
+    ``data`` is one or more ``QueryDict`` or ``MultiValueDict`` instances.
+    If a name is in more than one of them, the first one is used.
+    The values are read from ``data`` when the validator asks for them,
+    rather than being copied in to a new dict.
+    """
+    def __init__(self, validator, *data):
+        self.fields = validator.fields
+        self.data = data
+
+    def __getitem__(self, name):
+        for data in self.data:
+            if name in data:
+                if isinstance(self.fields.get(name), fields.ListField):
+                    return data.getlist(name)
+                return data[name]
+        raise KeyError(name)
+
+    def __iter__(self):
+        if len(self.data) == 1:
+            return iter(self.data[0])
+        return iter(collections.OrderedDict.fromkeys(itertools.chain(*self.data)))
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+    def __repr__(self):
+        return '<{}: {!r}>'.format(type(self).__name__, self.data)
+
+
+#: Content types that are parsed by Django in to ``request.POST`` and ``request.FILES``.
+form_content_types = frozenset(['application/x-www-form-urlencoded', 'multipart/form-data'])
+
+
+def error_body(code, message):
+    # Errors for the whole request body have the root JSON pointer, ''
+    errors = {'': [{'code': code, 'message': message}]}
+    return json.dumps({'errors': errors}).encode('utf-8')
+
+
+# The responses for requests that can not be cleaned at all are always the same,
+# so their bodies are only serialised once.
+too_large_body = error_body('too_large', "Request body too large")
+invalid_json_body = error_body('invalid_json', "Invalid JSON")
+not_an_object_body = error_body('invalid_type', "Expected a JSON object")
+
+
+def read_request(request, validator, max_body_size=None):
+    """
+    Get the data to clean from a request.
+    Form data is read from ``request.POST`` and ``request.FILES``,
+    and any other request body is parsed as JSON.
+    Returns a tuple of ``(data, response)``,
+    where ``response`` is an error response if the data could not be read.
+    """
+    if max_body_size is not None:
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_body_size:
+            return None, json_response(too_large_body, status=413)
+
+    if request.content_type in form_content_types:
+        return FormData(validator, request.POST, request.FILES), None
+
+    body = request.body
+    if max_body_size is not None and len(body) > max_body_size:
+        return None, json_response(too_large_body, status=413)
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None, json_response(invalid_json_body)
+    if not isinstance(data, dict):
+        return None, json_response(not_an_object_body)
+    return data, None
+
+
+def json_response(body, status=400):
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
+def errors_response(errors):
+    """
+    Make a 400 response listing the errors for invalid data,
+    using :meth:`~valedictory.exceptions.InvalidDataException.to_json`.
+    """
+    return json_response(('{"errors": ' + errors.to_json() + '}').encode('utf-8'))
+
+
+def clean_request(request, validator, max_body_size=None):
+    """
+    Clean the data in a request, setting ``request.cleaned_data``.
+    Returns an error response if the data could not be read or is invalid,
+    otherwise returns ``None``.
+    """
+    data, response = read_request(request, validator, max_body_size)
+    if response is not None:
+        return response
+    try:
+        request.cleaned_data = validator.clean(data)
+    except InvalidDataException as errors:
+        return errors_response(errors)
+    return None
+
+
+async def aclean_request(request, validator, max_body_size=None):
+    """
+    Clean the data in a request from async code, the same as :func:`clean_request`.
+    """
+    data, response = read_request(request, validator, max_body_size)
+    if response is not None:
+        return response
+    try:
+        request.cleaned_data = await validator.aclean(data)
+    except InvalidDataException as errors:
+        return errors_response(errors)
+    return None
+
+
+#: The HTTP methods whose request bodies are cleaned by default.
+body_methods = ('POST', 'PUT', 'PATCH')
+
+
+def validate_request(validator, max_body_size=None, methods=None):
+    """
+    A decorator for views that cleans the request body with ``validator``.
+    The cleaned data is set as ``request.cleaned_data``
+    before the view is called.
+
+    .. code:: python
+
+        @require_POST
+        @validate_request(OrderValidator(), max_body_size=64 * 1024)
+        def create_order(request):
+            order = Order.objects.create(**request.cleaned_data)
+            ...
+
+    JSON request bodies are parsed once, and cleaned.
+    Form data is cleaned using :class:`FormData`.
+
+    If the data is invalid, the view is not called,
+    and a 400 response is returned with a JSON body listing the errors:
+
+    .. code:: json
+
+        {"errors": {"/items/2/quantity": [{"code": "min_value", "message": "..."}]}}
+
+    Requests with a body larger than ``max_body_size`` bytes get a 413 response.
+    The size is checked against the ``Content-Length`` header
+    before the body is read.
+
+    Only requests using one of ``methods`` are cleaned,
+    defaulting to ``POST``, ``PUT``, and ``PATCH``.
+    Other requests, such as ``GET``, are passed straight to the view,
+    without ``request.cleaned_data``.
+
+    Async views are cleaned with :meth:`~valedictory.Validator.aclean`.
+    """
+    if methods is None:
+        methods = body_methods
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    response = await aclean_request(request, validator, max_body_size)
+                    if response is not None:
+                        return response
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                response = clean_request(request, validator, max_body_size)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ValidateRequestMixin:
+    """
+    A mixin for class based views that cleans the request body
+    the same as :func:`validate_request`,
+    for the HTTP methods in :attr:`validate_methods`.
+    Views with async handlers, supported by Django 4.1 and later,
+    are cleaned with :meth:`~valedictory.Validator.aclean`.
+
+    .. code:: python
+
+        class OrderView(ValidateRequestMixin, View):
+            validator = OrderValidator()
+            max_body_size = 64 * 1024
+
+            def post(self, request):
+                order = Order.objects.create(**request.cleaned_data)
+                ...
+
+    .. autoattribute:: validator
+        :annotation:
+
+    .. autoattribute:: max_body_size
+        :annotation:
+
+    .. autoattribute:: validate_methods
+        :annotation:
+    """
+
+    #: The validator to clean the request body with.
+    validator = None
+
+    #: The largest request body to accept, in bytes.
+    #: Defaults to ``None``, which leaves the limit to Django.
+    max_body_size = None
+
+    #: The HTTP methods to clean the request body for.
+    validate_methods = body_methods
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.validate_methods:
+            return super().dispatch(request, *args, **kwargs)
+        if getattr(self, 'view_is_async', False):
+            return self.adispatch(request, *args, **kwargs)
+
+        response = clean_request(request, self.validator, self.max_body_size)
+        if response is not None:
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        Clean the request body for an async view,
+        using :meth:`~valedictory.Validator.aclean`.
+        """
+        response = await aclean_request(request, self.validator, self.max_body_size)
+        if response is not None:
+            return response
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class QueryProfile:
+    """
+    The database queries made while cleaning some data,
+    and the field that made each query.
+    Made by :func:`profile_queries`.
+
+    Fields are identified by their path in the data, as a tuple of names,
+    the same as the paths from
+    :meth:`~valedictory.exceptions.InvalidDataException.flatten`.
+    Items in a :class:`~valedictory.fields.ListField` all share the path
+    of the list, so the queries for every item are counted together:
+    a field that makes one query per item stands out.
+
+    .. autoattribute:: queries
+        :annotation:
+
+    .. autoattribute:: cleaned_data
+        :annotation:
+
+    .. autoattribute:: errors
+        :annotation:
+
+    .. automethod:: by_path
+    """
+
+    #: A list of ``(path, alias, sql, duration)`` tuples,
+    #: one for each query in the order they were made.
+    #: ``duration`` is in seconds.
+    queries = None
+
+    #: The cleaned data, if the data was valid.
+    cleaned_data = None
+
+    #: The :exc:`~valedictory.exceptions.InvalidDataException`,
+    #: if the data was not valid.
+    errors = None
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def count(self):
+        """
+        The total number of queries made.
+        """
+        return len(self.queries)
+
+    @property
+    def time(self):
+        """
+        The total time spent in the database, in seconds.
+        """
+        return sum(duration for path, alias, sql, duration in self.queries)
+
+    def by_path(self):
+        """
+        Get a dict mapping each field path to a ``(count, time)`` tuple
+        of the number of queries that field made, and the time they took.
+        Queries not made by any field have an empty path.
+        """
+        totals = collections.OrderedDict()
+        for path, alias, sql, duration in self.queries:
+            count, time = totals.get(path, (0, 0.0))
+            totals[path] = (count + 1, time + duration)
+        return totals
+
+    def __str__(self):
+        lines = ['{} queries in {:.1f}ms'.format(self.count, self.time * 1000)]
+        for path, (count, time) in self.by_path().items():
+            lines.append('  {}: {} queries in {:.1f}ms'.format(
+                '.'.join(map(str, path)) or '(validator)', count, time * 1000))
+        return '\n'.join(lines)
+
+
+def profile_queries(validator, data):
+    """
+    Clean ``data`` with ``validator``,
+    and record the database queries each field makes.
+    Returns a :class:`QueryProfile`.
+    The data is cleaned with a copy of the validator,
+    so the validator itself is not changed.
+    Errors in the data do not raise an exception,
+    and are available as :attr:`QueryProfile.errors` instead.
+
+    Only queries made in the current thread are recorded,
+    so queries made by a :class:`~valedictory.fields.ListField`
+    with an :attr:`~valedictory.fields.ListField.executor` are missed.
+
+    .. code:: python
+
+        profile = profile_queries(OrderValidator(), order_data)
+        print(profile)
+    """
+    profile = QueryProfile()
+    paths = []
+
+    def record_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            path = paths[-1] if paths else ()
+            profile.queries.append((
+                path, context['connection'].alias, sql, time.perf_counter() - start))
+
+    validator = track_fields(validator, (), paths)
+
+    with contextlib.ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record_query))
+        try:
+            profile.cleaned_data = validator.clean(data)
+        except InvalidDataException as err:
+            profile.errors = err
+    return profile
+
+
+def assert_max_queries(validator, data, max_queries):
+    """
+    Assert that cleaning ``data`` with ``validator``
+    makes at most ``max_queries`` database queries.
+    Use this in tests to catch changes that add a query for every item in a list.
+    The :class:`QueryProfile` is returned,
+    so the cleaned data and any errors can be checked too.
+
+    .. code:: python
+
+        def test_order_queries(self):
+            data = {'items': [{'product': pk} for pk in product_pks]}
+            assert_max_queries(OrderValidator(), data, 2)
+    """
+    profile = profile_queries(validator, data)
+    if profile.count > max_queries:
+        raise AssertionError('Expected at most {} queries, but {}'.format(
+            max_queries, profile))
+    return profile
+
+
+def track_fields(validator, path, paths):
+    """
+    Make a copy of a validator that tracks which field is being cleaned.
+    The path of the innermost field being cleaned is at the end of ``paths``.
+
+    Only the validators and the fields containing other fields are copied.
+    The other fields are shared with the original validator,
+    so they find objects the same way they would without being tracked.
+    """
+    validator = copy.copy(validator)
+    validator.fields = {
+        name: TrackedField(field, path + (name,), paths)
+        for name, field in validator.fields.items()}
+    return validator
+
+
+class TrackedField:
+    """
+    Wraps a field, noting its path while it is being cleaned.
+    """
+    def __init__(self, field, path, paths):
+        if isinstance(field, fields.ListField):
+            field = copy.copy(field)
+            field.field = TrackedField(field.field, path, paths)
+        elif isinstance(field, fields.NestedValidator):
+            field = copy.copy(field)
+            field.validator = track_fields(field.validator, path, paths)
+        self.field = field
+        self.path = path
+        self.paths = paths
+
+    def clean(self, data):
+        self.paths.append(self.path)
+        try:
+            return self.field.clean(data)
+        finally:
+            self.paths.pop()
+
+    def clean_many(self, data):
+        self.paths.append(self.path)
+        try:
+            return self.field.clean_many(data)
+        finally:
+            self.paths.pop()
+
+    def __getattr__(self, name):
+        return getattr(self.field, name)
+
+
+class ImportResult:
+    """
+    The outcome of :func:`bulk_import`.
+
+    .. autoattribute:: created
+        :annotation:
+
+    .. autoattribute:: errors
+        :annotation:
+    """
+
+    #: The number of objects created.
+    created = 0
+
+    #: A dict mapping the index of each invalid record to the
+    #: :exc:`~valedictory.exceptions.InvalidDataException` for it.
+    errors = None
+
+    def __init__(self):
+        self.errors = collections.OrderedDict()
+
+    def __repr__(self):
+        return '<{} created={} errors={}>'.format(
+            type(self).__name__, self.created, len(self.errors))
+
+
+def bulk_import(model, validator, records, chunk_size=1000, batch_size=None,
+                atomic=False, using=None, make_object=None):
+    """
+    Clean many records, such as the rows of a CSV file,
+    and create a ``model`` instance for each valid record.
+    Returns an :class:`ImportResult` with the number of objects created,
+    and the errors for the invalid records.
+
+    ``records`` can be any iterable, and is read ``chunk_size`` records at a time,
+    so a large file can be imported without reading all of it in to memory.
+    The valid records in each chunk are saved with ``QuerySet.bulk_create()``,
+    in batches of ``batch_size`` if set.
+    If ``atomic`` is ``True``, each chunk is saved in its own transaction.
+    ``using`` is the alias of the database to create the objects in.
+
+    Each cleaned record is passed to ``make_object`` to make the model instance.
+    By default this is ``model(**cleaned_data)``.
+
+    All the keys for each :class:`ForeignKeyField` of the validator
+    are looked up at once for each chunk,
+    rather than once for each record.
+
+    .. code:: python
+
+        with open('products.csv') as f:
+            result = bulk_import(Product, ProductValidator(), csv.DictReader(f))
+        for index, errors in result.errors.items():
+            print(index, dict(errors.flatten()))
+    """
+    if make_object is None:
+        def make_object(cleaned_data):
+            return model(**cleaned_data)
+    manager = model._default_manager
+    if using is not None:
+        manager = manager.db_manager(using)
+
+    result = ImportResult()
+    records = iter(records)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+
+        objects = []
+        started = scope.start()
+        try:
+            prefetch_foreign_keys(validator, chunk)
+            for index, record in enumerate(chunk, start):
+                try:
+                    objects.append(make_object(validator.clean(record)))
+                except InvalidDataException as err:
+                    result.errors[index] = err
+        finally:
+            if started:
+                scope.finish()
+
+        if objects:
+            if atomic:
+                with transaction.atomic(using=manager.db):
+                    manager.bulk_create(objects, batch_size=batch_size)
+            else:
+                manager.bulk_create(objects, batch_size=batch_size)
+            result.created += len(objects)
+        start += len(chunk)
+
+    return result
+
+
+def prefetch_foreign_keys(validator, records):
+    """
+    Find the objects for the keys of every :class:`ForeignKeyField`
+    in a validator, across many records at once.
+    The objects are kept in the current scope,
+    where the fields find them when each record is cleaned.
+    """
+    for name, field in validator.fields.items():
+        if not isinstance(field, ForeignKeyField):
+            continue
+        if type(field).clean is not ForeignKeyField.clean or '__' in field.field:
+            continue
+        keys = [record[name] for record in records if name in record]
+        # Invalid keys are reported when each record is cleaned
+        prepared_keys = field.prepare_keys(keys, ListErrors())
+        field.find_many(set(prepared_keys.values()))
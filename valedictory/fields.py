@@ -1,13 +1,46 @@
+import collections
 import copy
 import datetime
+import functools
 import re
+import threading
 from decimal import Decimal
 from gettext import gettext as _
 
-import aniso8601
-
+from . import dateparse, luhn, scope
 from .base import ErrorMessageMixin
-from .exceptions import BaseValidationException, InvalidDataException, NoData
+from .choices import LazyChoices, is_shared
+from .exceptions import (
+    BaseValidationException, InvalidDataException, ListErrors, NoData)
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:
+    sync_to_async = None
+
+
+def overridden_outside(field, *names):
+    """
+    Has the class of ``field`` overridden any of the methods ``names``
+    with methods from outside of valedictory?
+    These might block, such as by querying a database,
+    so are not called directly from async code.
+    """
+    cls = type(field)
+    return any(
+        not getattr(cls, name).__module__.startswith('valedictory.')
+        for name in names)
+
+
+async def call_blocking(func, *args):
+    """
+    Call a synchronous function from async code.
+    If asgiref is installed, the function is run with ``sync_to_async``,
+    so it can use the database without blocking the event loop.
+    """
+    if sync_to_async is None:
+        return func(*args)
+    return await sync_to_async(func)(*args)
 
 
 class Field(ErrorMessageMixin):
@@ -21,6 +54,8 @@ class Field(ErrorMessageMixin):
     .. autoattribute:: required
     .. autoattribute:: default
         :annotation:
+    .. autoattribute:: clean_in_batches
+    .. autoattribute:: clean_in_executor
 
     .. autoattribute:: default_error_messages
         :annotation:
@@ -28,6 +63,9 @@ class Field(ErrorMessageMixin):
     **Methods**
 
     .. automethod:: clean
+    .. automethod:: clean_many
+    .. automethod:: aclean
+    .. automethod:: aclean_many
     .. automethod:: error
     """
 
@@ -44,6 +82,20 @@ class Field(ErrorMessageMixin):
     #: cleaned data.
     default = NoData
 
+    #: Does :meth:`clean_many` do work for all the items at once,
+    #: such as looking them all up in one database query.
+    #: A :class:`ListField` with an :attr:`~ListField.executor`
+    #: gives these fields all the items in one batch by default,
+    #: instead of cleaning each item separately.
+    clean_in_batches = False
+
+    #: Can a :class:`ListField` with an :attr:`~ListField.executor`
+    #: clean this field in the threads of the executor.
+    #: Fields that use something belonging to the calling thread,
+    #: such as a database connection and its transaction,
+    #: set this to ``False``, and are cleaned in the calling thread instead.
+    clean_in_executor = True
+
     #: A dictionary of messages for each error this field can raise.
     #: The default error messages can be overridden by passing an
     #: ``error_messages`` dict to the constructor.
@@ -90,6 +142,76 @@ class Field(ErrorMessageMixin):
                 raise NoData
         return data
 
+    def clean_many(self, data):
+        """
+        Clean and validate a list of values, such as the items in a
+        :class:`ListField`, returning a list of the cleaned values.
+
+        If any values are invalid, a
+        :exc:`~valedictory.exceptions.ListErrors` will be raised,
+        with the errors keyed by the index of the invalid value.
+
+        By default each value is cleaned with :meth:`clean`.
+        Fields that can validate many values more efficiently at once
+        can override this.
+        """
+        errors = None
+        cleaned_list = []
+        for i, datum in enumerate(data):
+            try:
+                cleaned_list.append(self.clean(datum))
+            except BaseValidationException as err:
+                if errors is None:
+                    errors = ListErrors()
+                errors.add(i, err)
+
+        if errors:
+            raise errors
+        return cleaned_list
+
+    async def aclean(self, data):
+        """
+        Clean and validate the given data from async code.
+        This is used by :meth:`~valedictory.Validator.aclean`.
+
+        By default this calls :meth:`clean`.
+        Fields that do I/O, such as looking up a database,
+        can override this to do so without blocking the event loop.
+        If a subclass overrides :meth:`clean` but not this,
+        :meth:`clean` is called in a worker thread using ``sync_to_async``.
+        """
+        if overridden_outside(self, 'clean'):
+            return await call_blocking(self.clean, data)
+        return self.clean(data)
+
+    async def aclean_many(self, data):
+        """
+        Clean and validate a list of values from async code,
+        the same as :meth:`clean_many`.
+
+        If the field does not override :meth:`aclean`,
+        this calls :meth:`clean_many`.
+        Otherwise each value is cleaned in turn with :meth:`aclean`.
+        """
+        if type(self).aclean is Field.aclean:
+            if overridden_outside(self, 'clean', 'clean_many'):
+                return await call_blocking(self.clean_many, data)
+            return self.clean_many(data)
+
+        errors = None
+        cleaned_list = []
+        for i, datum in enumerate(data):
+            try:
+                cleaned_list.append(await self.aclean(datum))
+            except BaseValidationException as err:
+                if errors is None:
+                    errors = ListErrors()
+                errors.add(i, err)
+
+        if errors:
+            raise errors
+        return cleaned_list
+
 
 class TypedField(Field):
     """
@@ -135,8 +257,8 @@ class TypedField(Field):
 
         if required_types is not None:
             self.required_types = required_types
-        if required_types is not None:
-            self.required_types = required_types
+        if excluded_types is not None:
+            self.excluded_types = excluded_types
         if type_name is not None:
             self.type_name = type_name
 
@@ -149,6 +271,28 @@ class TypedField(Field):
 
         return value
 
+    def exact_types(self):
+        """
+        The set of types that values can be checked against exactly,
+        using ``type(value) in exact_types``, instead of using ``isinstance``.
+        Values of any of these types will pass the type checks in :meth:`clean`.
+        """
+        required_types = self.required_types
+        if not isinstance(required_types, tuple):
+            required_types = (required_types,)
+        return frozenset(
+            required_type for required_type in required_types
+            if not issubclass(required_type, self.excluded_types))
+
+    def clean_many(self, data):
+        # If every value is exactly one of the required types,
+        # all values are valid and there is no need to check them one by one.
+        # Otherwise clean each value to find the errors.
+        if type(self).clean is TypedField.clean and \
+                self.exact_types().issuperset(map(type, data)):
+            return list(data)
+        return super().clean_many(data)
+
 
 class StringField(TypedField):
     """
@@ -221,6 +365,18 @@ class StringField(TypedField):
 
         return value
 
+    def clean_many(self, data):
+        if type(self).clean is StringField.clean and data and \
+                self.exact_types().issuperset(map(type, data)):
+            min_length = self.min_length
+            if self.required:
+                # Empty strings are not allowed for required fields
+                min_length = max(min_length, 1)
+            lengths = list(map(len, data))
+            if min(lengths) >= min_length and max(lengths) <= self.max_length:
+                return list(data)
+        return super(TypedField, self).clean_many(data)
+
 
 class BooleanField(TypedField):
     """
@@ -290,6 +446,16 @@ class NumberField(TypedField):
 
         return value
 
+    def clean_many(self, data):
+        if type(self).clean is NumberField.clean and \
+                self.exact_types().issuperset(map(type, data)):
+            # min() and max() can not be used here, as NaN breaks them
+            minimum, maximum = self.min, self.max
+            if not ((minimum is not None and any(value < minimum for value in data)) or
+                    (maximum is not None and any(value > maximum for value in data))):
+                return list(data)
+        return super(TypedField, self).clean_many(data)
+
 
 class IntegerField(NumberField):
     """
@@ -340,10 +506,14 @@ class DateTimeField(StringField):
     A field that only accepts ISO 8601 date time strings.
 
     After cleaning, a ``datetime.datetime`` instance is returned.
+    All returned values with the same UTC offset share the same ``tzinfo``.
 
     .. autoattribute:: timezone_required
         :annotation:
 
+    .. autoattribute:: normalize_to_utc
+        :annotation:
+
     .. autoattribute:: default_error_messages
         :annotation:
     """
@@ -355,6 +525,12 @@ class DateTimeField(StringField):
     #: allowed.
     timezone_required = True
 
+    #: If timezone aware datetimes should be converted to UTC.
+    #: The returned datetimes will all have a ``tzinfo`` of
+    #: ``datetime.timezone.utc``.
+    #: Naive datetimes are not changed.
+    normalize_to_utc = False
+
     #:
     #: invalid_format
     #:     Raised when the input is not a valid ISO8601-formatted date time
@@ -366,22 +542,31 @@ class DateTimeField(StringField):
         'no_timezone': _("A timezone must be specified"),
     }
 
-    def __init__(self, *, timezone_required=None, **kwargs):
+    def __init__(self, *, timezone_required=None, normalize_to_utc=None, **kwargs):
         super().__init__(**kwargs)
 
         if timezone_required is not None:
             self.timezone_required = timezone_required
+        if normalize_to_utc is not None:
+            self.normalize_to_utc = normalize_to_utc
 
     def clean(self, data):
         date_string = super(DateTimeField, self).clean(data)
 
         try:
-            value = aniso8601.parse_datetime(date_string)
+            value = dateparse.parse_datetime(date_string)
         except (ValueError, NotImplementedError):
             raise self.error('invalid_format')
 
-        if self.timezone_required and value.tzinfo is None:
-            raise self.error('no_timezone')
+        if value.tzinfo is None:
+            if self.timezone_required:
+                raise self.error('no_timezone')
+        elif self.normalize_to_utc:
+            try:
+                value = value.astimezone(datetime.timezone.utc)
+            except OverflowError:
+                # Dates such as 0001-01-01T00:00:00+10:00 are before year 1 in UTC
+                raise self.error('invalid_format')
 
         return value
 
@@ -409,7 +594,7 @@ class DateField(StringField):
     def clean(self, data):
         date_string = super(DateField, self).clean(data)
         try:
-            return aniso8601.parse_date(date_string)
+            return dateparse.parse_date(date_string)
         except ValueError:
             raise self.error('invalid_format')
 
@@ -452,10 +637,10 @@ class TimeField(StringField):
             self.timezone_required = timezone_required
 
     def clean(self, data):
-        time_string = super(DateTimeField, self).clean(data)
+        time_string = super(TimeField, self).clean(data)
 
         try:
-            value = aniso8601.parse_time(time_string)
+            value = dateparse.parse_time(time_string)
         except (ValueError, NotImplementedError):
             raise self.error('invalid_format')
 
@@ -489,18 +674,24 @@ class YearMonthField(StringField):
         date_string = super(YearMonthField, self).clean(data)
 
         try:
-            date = datetime.datetime.strptime(date_string, "%Y-%m").date()
+            return dateparse.parse_year_month(date_string)
         except ValueError:
             raise self.error('invalid_format')
 
-        return (date.year, date.month)
-
 
 class ChoiceField(Field):
     """
     A field that only accepts values from a predefined set of choices.
     The values can be of any hashable type.
 
+    The choices are copied in to a new set for each field,
+    unless they are a ``frozenset`` or a
+    :class:`~valedictory.choices.LazyChoices` instance.
+    These can not be modified, so are shared between all fields using them.
+    For large sets of choices, this saves a lot of memory.
+    Use a :class:`~valedictory.choices.LazyChoices`
+    to load the choices when they are first needed.
+
     .. autoattribute:: choices
         :annotation: = set()
 
@@ -521,12 +712,20 @@ class ChoiceField(Field):
     def __init__(self, choices=None, **kwargs):
         super(ChoiceField, self).__init__(**kwargs)
         if choices is not None:
-            self.choices = set(choices)
+            if is_shared(choices):
+                self.choices = choices
+            else:
+                self.choices = set(choices)
 
     def clean(self, data):
         value = super(ChoiceField, self).clean(data)
+        choices = self.choices
+        if isinstance(choices, LazyChoices):
+            # Load the choices outside of the try,
+            # so that errors from the loader are not reported as invalid choices
+            choices = choices.load()
         try:
-            if value not in self.choices:
+            if value not in choices:
                 raise self.error('invalid_choice')
         except TypeError:
             # ``{} in set()`` throws a TypeError: unhashable type: 'dict'
@@ -536,7 +735,8 @@ class ChoiceField(Field):
 
     def __deepcopy__(self, memo):
         obj = super().__deepcopy__(memo)
-        obj.choices = copy.deepcopy(obj.choices, memo)
+        if not is_shared(obj.choices):
+            obj.choices = copy.deepcopy(obj.choices, memo)
         return obj
 
 
@@ -559,6 +759,13 @@ class ChoiceMapField(Field):
     would only accept one of the numbers 1, 2 or 3 as input,
     and would return one of the strings "one", "two", or "three".
 
+    The choices are copied in to a new dict for each field,
+    unless they are a ``types.MappingProxyType`` or a
+    :class:`~valedictory.choices.LazyChoices` instance,
+    which are shared between all fields using them.
+    Use a :class:`~valedictory.choices.LazyChoices`
+    to load the choices when they are first needed.
+
     .. autoattribute:: choices
         :annotation: = set()
 
@@ -579,19 +786,26 @@ class ChoiceMapField(Field):
     def __init__(self, choices=None, **kwargs):
         super(ChoiceMapField, self).__init__(**kwargs)
         if choices is not None:
-            self.choices = dict(choices)
+            if is_shared(choices):
+                self.choices = choices
+            else:
+                self.choices = dict(choices)
 
     def clean(self, data):
         value = super(ChoiceMapField, self).clean(data)
+        choices = self.choices
+        if isinstance(choices, LazyChoices):
+            choices = choices.load()
         try:
-            return self.choices[value]
+            return choices[value]
         except (KeyError, TypeError):
             # self.choices[{}] throws a TypeError: unhashable type: 'dict'
             raise self.error('invalid_choice')
 
     def __deepcopy__(self, memo):
         obj = super().__deepcopy__(memo)
-        obj.choices = copy.deepcopy(obj.choices, memo)
+        if not is_shared(obj.choices):
+            obj.choices = copy.deepcopy(obj.choices, memo)
         return obj
 
 
@@ -683,12 +897,19 @@ class PunctuatedCharacterField(TypedField):
     def clean(self, data):
         value = super(PunctuatedCharacterField, self).clean(data)
 
-        # Strip out punctuation
-        alphabet_dict = dict((ord(c), None) for c in self.alphabet)
-        punctuation_dict = dict((ord(c), None) for c in self.punctuation)
+        alphabet_table, punctuation_table, alphabet_bytes, punctuation_bytes = \
+            character_tables(self.alphabet or '', self.punctuation or '')
 
-        value = value.translate(punctuation_dict)
-        stripped_value = value.translate(alphabet_dict)
+        # Strip out punctuation
+        try:
+            ascii_value = value.encode('ascii')
+        except UnicodeEncodeError:
+            value = value.translate(punctuation_table)
+            stripped_value = value.translate(alphabet_table)
+        else:
+            ascii_value = ascii_value.translate(None, punctuation_bytes)
+            stripped_value = ascii_value.translate(None, alphabet_bytes)
+            value = ascii_value.decode('ascii')
 
         if len(stripped_value) != 0:
             raise self.error('allowed_characters', {
@@ -704,6 +925,28 @@ class PunctuatedCharacterField(TypedField):
         return value
 
 
+@functools.lru_cache(maxsize=256)
+def character_tables(alphabet, punctuation):
+    """
+    Build the tables used by :class:`PunctuatedCharacterField`
+    to strip ``alphabet`` and ``punctuation`` characters from values.
+    The tables are cached for each pair of strings,
+    so fields with the same characters share them,
+    and changing the characters of a field never leaves its tables out of date.
+    """
+    # Tables for str.translate, used for any non-ASCII input
+    alphabet_table = dict.fromkeys(map(ord, alphabet))
+    punctuation_table = dict.fromkeys(map(ord, punctuation))
+
+    # Characters to delete using bytes.translate, used for ASCII input.
+    # Non-ASCII characters can never appear in ASCII input,
+    # so they can be left out.
+    alphabet_bytes = ''.join(c for c in alphabet if ord(c) < 128).encode('ascii')
+    punctuation_bytes = ''.join(c for c in punctuation if ord(c) < 128).encode('ascii')
+
+    return alphabet_table, punctuation_table, alphabet_bytes, punctuation_bytes
+
+
 class RestrictedCharacterField(PunctuatedCharacterField):
     """
     A field that only allows a defined alphabet of characters to be used.
@@ -761,11 +1004,55 @@ class CreditCardField(PunctuatedCharacterField):
 
         return value
 
+    def clean_many(self, data):
+        """
+        Clean a list of credit card numbers,
+        checking the Luhn checksums of all of them at once
+        using :meth:`luhn_checksum_many`.
+        """
+        if type(self).clean is not CreditCardField.clean:
+            # A subclass has changed how single values are cleaned
+            return super(CreditCardField, self).clean_many(data)
+
+        errors = None
+        card_numbers = []
+        indexes = []
+        for i, datum in enumerate(data):
+            try:
+                card_numbers.append(super(CreditCardField, self).clean(datum))
+                indexes.append(i)
+            except BaseValidationException as err:
+                if errors is None:
+                    errors = ListErrors()
+                errors.add(i, err)
+
+        checksums = self.luhn_checksum_many(card_numbers)
+        for i, valid in zip(indexes, checksums):
+            if not valid:
+                if errors is None:
+                    errors = ListErrors()
+                errors.add(i, self.error('luhn_checksum'))
+
+        if errors:
+            raise errors
+        return card_numbers
+
     def luhn_checksum(self, card_number):
-        digits = list(map(int, reversed(card_number)))
-        evens = sum(digits[0::2])
-        odds = sum(sum(divmod(digit * 2, 10)) for digit in digits[1::2])
-        return (evens + odds) % 10 == 0
+        return luhn.checksum(card_number)
+
+    def luhn_checksum_many(self, card_numbers):
+        """
+        Check the Luhn checksum of a list of card numbers,
+        returning a list of bools.
+        Large batches are checked using NumPy, if it is installed.
+        """
+        if type(self).luhn_checksum is not CreditCardField.luhn_checksum:
+            return [self.luhn_checksum(card_number) for card_number in card_numbers]
+        return luhn.checksum_many(card_numbers)
+
+
+# The executors each thread is cleaning items for
+executor_threads = threading.local()
 
 
 class ListField(TypedField):
@@ -779,9 +1066,27 @@ class ListField(TypedField):
         class MyValidator(Validator):
             numbers = ListField(IntegerField())
 
+    The items are cleaned using :meth:`Field.clean_many`,
+    so fields can validate all the items at once.
+    Lists of simple values, such as strings, numbers, or booleans,
+    are checked in a single pass.
+
     .. autoattribute:: field
         :annotation:
 
+    .. autoattribute:: min_items
+
+    .. autoattribute:: max_items
+
+    .. autoattribute:: executor
+        :annotation:
+
+    .. autoattribute:: concurrency
+
+    .. autoattribute:: batch_size
+
+    .. autoattribute:: default_error_messages
+        :annotation:
     """
 
     #: The field to validate all elements of the input data against.
@@ -790,7 +1095,48 @@ class ListField(TypedField):
     required_types = list
     type_name = 'list'
 
-    def __init__(self, field=None, **kwargs):
+    #: The minimum number of items in the list.
+    #: Defaults to no minimum.
+    min_items = 0
+
+    #: The maximum number of items in the list.
+    #: Defaults to no maximum.
+    max_items = float('inf')
+
+    #: A ``concurrent.futures.Executor`` used to clean the items concurrently.
+    #: This is useful when cleaning an item is I/O bound,
+    #: such as a field that looks up each item in another service.
+    #: The executor is shared between all copies of this field.
+    #: By default items are cleaned in the current thread.
+    #: Items are always cleaned in the current thread if the field
+    #: does not set :attr:`~Field.clean_in_executor`,
+    #: such as a :class:`~valedictory.ext.django.ForeignKeyField`,
+    #: as the threads of the executor would use their own database connections.
+    executor = None
+
+    #: The maximum number of batches being cleaned at once using :attr:`executor`.
+    #: Defaults to no limit, other than the limits of the executor itself.
+    concurrency = None
+
+    #: The number of items in each batch cleaned using :attr:`executor`.
+    #: Each batch is cleaned with :meth:`Field.clean_many`.
+    #: Defaults to the whole list for fields that set
+    #: :attr:`~Field.clean_in_batches`, and one item for other fields.
+    batch_size = None
+
+    #:
+    #: min_items
+    #:     Raised when the list has fewer items than :attr:`min_items`.
+    #:
+    #: max_items
+    #:     Raised when the list has more items than :attr:`max_items`.
+    default_error_messages = {
+        'min_items': _("Minimum of {min} items"),
+        'max_items': _("Maximum of {max} items"),
+    }
+
+    def __init__(self, field=None, min_items=None, max_items=None,
+                 executor=None, concurrency=None, batch_size=None, **kwargs):
         """
         Construct a new ListField
 
@@ -799,22 +1145,118 @@ class ListField(TypedField):
 
         * ``field`` should be an instance of a Field subclass. Each item in the
           submitted list will be validated and cleaned with Field.
+        * ``min_items`` and ``max_items`` set the minimum and maximum number
+          of items in the list. These are checked before any items are cleaned.
+        * ``executor``, ``concurrency``, and ``batch_size`` set the
+          :attr:`executor` to clean items with, the maximum number of batches
+          to clean at once, and the number of items in each batch.
         """
         super(ListField, self).__init__(**kwargs)
 
         if field is not None:
             self.field = field
+        if min_items is not None:
+            self.min_items = min_items
+        if max_items is not None:
+            self.max_items = max_items
+        if executor is not None:
+            self.executor = executor
+        if concurrency is not None:
+            self.concurrency = concurrency
+        if batch_size is not None:
+            self.batch_size = batch_size
 
     def clean(self, data):
+        value = self.clean_list(data)
+        if self.executor is not None and self.field.clean_in_executor:
+            return self.clean_concurrently(value)
+        return self.field.clean_many(value)
+
+    @property
+    def clean_in_executor(self):
+        return self.field.clean_in_executor
+
+    async def aclean(self, data):
+        if type(self).clean is not ListField.clean:
+            return await call_blocking(self.clean, data)
+        value = self.clean_list(data)
+        return await self.field.aclean_many(value)
+
+    def clean_list(self, data):
+        """
+        Check the list itself, before any of the items are cleaned.
+        """
         value = super(ListField, self).clean(data)
 
-        errors = InvalidDataException()
-        cleaned_list = []
-        for i, datum in enumerate(value):
+        if len(value) < self.min_items:
+            raise self.error('min_items', {'min': self.min_items})
+        if len(value) > self.max_items:
+            raise self.error('max_items', {'max': self.max_items})
+
+        return value
+
+    def clean_concurrently(self, data):
+        """
+        Clean all the items using :attr:`executor`,
+        with at most :attr:`concurrency` batches of items being cleaned at once.
+        The cleaned items and any errors are in the same order as the input.
+        """
+        executor = self.executor
+        if executor in getattr(executor_threads, 'executors', ()):
+            # This is already running in one of the executor's threads.
+            # Waiting on the executor from here could deadlock,
+            # if every thread is waiting on items that can never start.
+            return self.field.clean_many(data)
+
+        batch_size = self.batch_size
+        if batch_size is None:
+            batch_size = len(data) if self.field.clean_in_batches else 1
+        batch_size = max(batch_size, 1)
+
+        def clean_batch(batch):
+            executors = getattr(executor_threads, 'executors', ())
+            executor_threads.executors = executors + (executor,)
             try:
-                cleaned_list.append(self.field.clean(datum))
+                return self.field.clean_many(batch), None
             except BaseValidationException as err:
-                errors.invalid_fields[i].append(err)
+                return None, err
+            finally:
+                executor_threads.executors = executors
+
+        errors = None
+        cleaned_list = []
+
+        def collect(start, future):
+            nonlocal errors
+            cleaned, err = future.result()
+            if err is None:
+                cleaned_list.extend(cleaned)
+                return
+            if errors is None:
+                errors = ListErrors()
+            if isinstance(err, InvalidDataException):
+                for index, item_errors in err.invalid_fields.items():
+                    for item_error in item_errors:
+                        errors.add(start + index, item_error)
+            else:
+                errors.add(start, err)
+
+        # Make the scope storage now, so that every batch shares it
+        started = scope.start(eager=True)
+        pending = collections.deque()
+        try:
+            for start in range(0, len(data), batch_size):
+                if self.concurrency is not None and len(pending) >= self.concurrency:
+                    collect(*pending.popleft())
+                batch = data[start:start + batch_size]
+                pending.append((start, executor.submit(scope.bind(clean_batch), batch)))
+            while pending:
+                collect(*pending.popleft())
+        finally:
+            for start, future in pending:
+                future.cancel()
+            if started:
+                scope.finish()
 
         if errors:
             raise errors
@@ -881,6 +1323,16 @@ class NestedValidator(TypedField):
         value = super(NestedValidator, self).clean(data)
         return self.validator.clean(value)
 
+    async def aclean(self, data):
+        if type(self).clean is not NestedValidator.clean:
+            return await call_blocking(self.clean, data)
+        value = super(NestedValidator, self).clean(data)
+        return await self.validator.aclean(value)
+
+    @property
+    def clean_in_executor(self):
+        return all(field.clean_in_executor for field in self.validator.fields.values())
+
     def __deepcopy__(self, memo):
         obj = super().__deepcopy__(memo)
         obj.validator = copy.deepcopy(self.validator, memo)
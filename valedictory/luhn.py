@@ -0,0 +1,72 @@
+"""
+Luhn checksums, used to validate credit card numbers.
+
+Batches of card numbers are checked using NumPy, if it is installed.
+NumPy is not a requirement of valedictory;
+without it, card numbers are checked one at a time.
+"""
+
+import functools
+
+#: Batches with fewer card numbers than this are checked one at a time,
+#: as building the NumPy arrays costs more than it saves.
+numpy_threshold = 64
+
+# The sum of the digits of each digit when doubled
+doubled_digits = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+@functools.lru_cache(maxsize=None)
+def get_numpy():
+    """
+    Import NumPy, if it is installed. It is only imported when first needed,
+    so that importing valedictory does not pay the cost of importing NumPy.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def checksum(card_number):
+    """
+    Check if a string of digits passes the Luhn checksum.
+    """
+    digits = list(map(int, reversed(card_number)))
+    evens = sum(digits[0::2])
+    odds = sum(sum(divmod(digit * 2, 10)) for digit in digits[1::2])
+    return (evens + odds) % 10 == 0
+
+
+def checksum_many(card_numbers):
+    """
+    Check if each string of digits in a list passes the Luhn checksum.
+    Returns a list of bools, one for each card number.
+    """
+    card_numbers = list(card_numbers)
+    numpy = get_numpy()
+    if numpy is None or len(card_numbers) < numpy_threshold:
+        return [checksum(card_number) for card_number in card_numbers]
+
+    try:
+        return numpy_checksum_many(numpy, card_numbers)
+    except UnicodeEncodeError:
+        # Only ASCII digits can be checked with NumPy
+        return [checksum(card_number) for card_number in card_numbers]
+
+
+def numpy_checksum_many(numpy, card_numbers):
+    # Left pad all the card numbers with zeros to the same width,
+    # which does not change their checksum, and make a matrix of digits.
+    width = max(map(len, card_numbers))
+    buffer = ''.join(card_number.rjust(width, '0') for card_number in card_numbers)
+    digits = numpy.frombuffer(buffer.encode('ascii'), dtype=numpy.uint8)
+    digits = digits.reshape(len(card_numbers), width) - ord('0')
+
+    # Every second digit, counting from the right, is doubled
+    doubled = slice((width - 2) % 2, None, 2)
+    digits[:, doubled] = numpy.array(doubled_digits, dtype=numpy.uint8)[digits[:, doubled]]
+
+    totals = digits.sum(axis=1, dtype=numpy.int64)
+    return (totals % 10 == 0).tolist()
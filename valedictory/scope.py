@@ -0,0 +1,123 @@
+"""
+State shared by all the fields cleaning one piece of data.
+
+A scope is started when :meth:`~valedictory.Validator.clean`
+or :meth:`~valedictory.Validator.aclean` is called,
+and is finished when it returns.
+Nested validators share the scope of the outermost validator.
+Fields can keep data in the scope while the data is being cleaned,
+for example to avoid looking up the same database row twice.
+
+Scopes are stored in a context variable,
+so each thread and each asyncio task sees only its own scope.
+On Python versions without :mod:`contextvars`,
+scopes are local to each thread.
+"""
+
+import functools
+import threading
+
+try:
+    import contextvars
+    from contextvars import ContextVar
+except ImportError:  # Python < 3.7
+    contextvars = None
+    ContextVar = None
+
+
+class ThreadLocalVar:
+    """
+    A stand in for ``contextvars.ContextVar`` on Python versions without it.
+    """
+    def __init__(self, name, default=None):
+        self.local = threading.local()
+        self.default = default
+
+    def get(self):
+        return getattr(self.local, 'value', self.default)
+
+    def set(self, value):
+        self.local.value = value
+
+
+if ContextVar is not None:
+    current = ContextVar('valedictory_scope', default=None)
+else:
+    current = ThreadLocalVar('valedictory_scope', default=None)
+
+# Marks a scope that has started, but has not needed any storage yet.
+# Storage is only made when a field asks for it,
+# so cleaning data that does not use the scope allocates nothing.
+empty = object()
+
+
+def start(eager=False):
+    """
+    Start a scope, unless one has already started.
+    Returns ``True`` if a new scope was started,
+    in which case :func:`finish` must be called when cleaning is done.
+
+    If ``eager`` is ``True``, the storage for the scope is made straight away,
+    including for a scope that has already started.
+    Async code and code using threads should do this,
+    so that any tasks started while cleaning share the storage of the scope.
+    """
+    storage = current.get()
+    if storage is not None:
+        if eager and storage is empty:
+            current.set({})
+        return False
+    current.set({} if eager else empty)
+    return True
+
+
+def finish():
+    """
+    Finish the current scope, discarding everything stored in it.
+    """
+    current.set(None)
+
+
+def get(key, factory=dict):
+    """
+    Get the value stored in the current scope under ``key``,
+    creating it by calling ``factory`` if it does not exist yet.
+    Returns ``None`` when no scope is active.
+    """
+    storage = current.get()
+    if storage is None:
+        return None
+    if storage is empty:
+        storage = {}
+        current.set(storage)
+
+    try:
+        return storage[key]
+    except KeyError:
+        value = storage[key] = factory()
+        return value
+
+
+def bind(func):
+    """
+    Wrap ``func`` so that it uses the current scope when it is called,
+    even when it is called in another thread, such as by an executor.
+    Start the scope with ``eager=True`` first,
+    so that the storage exists and can be shared.
+    Bind the function again for each task,
+    as each bound function can only be running in one thread at a time.
+    """
+    if contextvars is not None:
+        context = contextvars.copy_context()
+        return functools.partial(context.run, func)
+
+    storage = current.get()
+
+    def bound(*args, **kwargs):
+        previous = current.get()
+        current.set(storage)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current.set(previous)
+    return bound
@@ -2,6 +2,7 @@ import copy
 import functools
 from gettext import gettext as _
 
+from . import scope
 from .base import ErrorMessageMixin
 from .exceptions import BaseValidationException, InvalidDataException, NoData
 from .fields import Field
@@ -38,15 +39,17 @@ class DeclarativeFieldsMetaclass(type):
             mcs, name, bases, attrs)
 
         # Set the declared fields to the `fields` attribute, merging in any
-        # existing fields
+        # existing fields. Only the fields each class sets itself are merged,
+        # and only the field that wins for each name is copied,
+        # so inherited fields are not copied again for every class in the MRO.
         fields = {}
-        field_sets = [getattr(base, 'fields', {}) for base in reversed(cls.__mro__)]
+        field_sets = [base.__dict__.get('fields') for base in reversed(cls.__mro__)]
         field_sets.append(new_fields)
         for field_set in field_sets:
             if field_set is None:
                 continue
-            for name, field in field_set.items():
-                fields[name] = copy.deepcopy(field)
+            fields.update(field_set)
+        fields = {name: copy.deepcopy(field) for name, field in fields.items()}
         setattr(cls, 'fields', fields)
 
         return cls
@@ -89,7 +92,37 @@ class BaseValidator(ErrorMessageMixin):
         If the data does not conform to the required schema,
         an :exc:`~valedictory.exceptions.InvalidDataException` will be raised.
         """
-        cleaned_data, errors = self.clean_fields(data, *args, **kwargs)
+        started = scope.start()
+        try:
+            if type(self).clean_fields is BaseValidator.clean_fields:
+                cleaned_data, errors = self.clean_fields_lazily(data, *args, **kwargs)
+            else:
+                cleaned_data, errors = self.clean_fields(data, *args, **kwargs)
+        finally:
+            if started:
+                scope.finish()
+
+        if errors:
+            raise errors
+        else:
+            return cleaned_data
+
+    async def aclean(self, data, *args, **kwargs):
+        """
+        Clean the data the same as :meth:`clean`,
+        but await each field using :meth:`~valedictory.fields.Field.aclean`.
+        Fields that do I/O, such as database lookups,
+        can do so without blocking the event loop.
+        """
+        started = scope.start(eager=True)
+        try:
+            if type(self).aclean_fields is BaseValidator.aclean_fields:
+                cleaned_data, errors = await self.aclean_fields_lazily(data, *args, **kwargs)
+            else:
+                cleaned_data, errors = await self.aclean_fields(data, *args, **kwargs)
+        finally:
+            if started:
+                scope.finish()
 
         if errors:
             raise errors
@@ -97,13 +130,27 @@ class BaseValidator(ErrorMessageMixin):
             return cleaned_data
 
     def clean_fields(self, data):
-        errors = InvalidDataException()
+        cleaned_data, errors = self.clean_fields_lazily(data)
+        if errors is None:
+            errors = InvalidDataException()
+        return cleaned_data, errors
+
+    async def aclean_fields(self, data):
+        cleaned_data, errors = await self.aclean_fields_lazily(data)
+        if errors is None:
+            errors = InvalidDataException()
+        return cleaned_data, errors
+
+    def clean_fields_lazily(self, data):
+        """
+        Clean the fields the same as :meth:`clean_fields`,
+        but only make the :exc:`~valedictory.exceptions.InvalidDataException`
+        when there is an error, returning ``None`` for the errors otherwise.
+        :meth:`clean` uses this unless :meth:`clean_fields` is overridden,
+        so cleaning valid data does not allocate anything it does not need.
+        """
+        errors = self.unknown_field_errors(data)
         cleaned_data = {}
-        # Check for unknown fields
-        if not self.allow_unknown_fields:
-            unknown_fields = set(data.keys()) - set(self.fields.keys())
-            for name in unknown_fields:
-                errors.invalid_fields[name].append(self.error('unknown'))
 
         # Validate all incoming fields
         for name, field in self.fields.items():
@@ -116,10 +163,55 @@ class BaseValidator(ErrorMessageMixin):
                 pass
 
             except BaseValidationException as err:
+                if errors is None:
+                    errors = InvalidDataException()
                 errors.invalid_fields[name].append(err)
 
         return cleaned_data, errors
 
+    async def aclean_fields_lazily(self, data):
+        errors = self.unknown_field_errors(data)
+        cleaned_data = {}
+
+        for name, field in self.fields.items():
+            try:
+                datum = data.get(name, NoData)
+                value = await field.aclean(datum)
+                cleaned_data[name] = value
+
+            except NoData:
+                pass
+
+            except BaseValidationException as err:
+                if errors is None:
+                    errors = InvalidDataException()
+                errors.invalid_fields[name].append(err)
+
+        return cleaned_data, errors
+
+    def unknown_field_errors(self, data):
+        """
+        Get the errors for any fields in ``data`` that this validator does not know,
+        or ``None`` if there are no unknown fields.
+        """
+        if self.allow_unknown_fields:
+            return None
+
+        errors = None
+        fields = self.fields
+        for name in data:
+            if name not in fields:
+                if errors is None:
+                    errors = InvalidDataException()
+                errors.invalid_fields[name].append(self.error('unknown'))
+        return errors
+
+    def check_unknown_fields(self, data, errors):
+        unknown_errors = self.unknown_field_errors(data)
+        if unknown_errors is not None:
+            for name, error_list in unknown_errors.invalid_fields.items():
+                errors.invalid_fields[name].extend(error_list)
+
     def __getitem__(self, key):
         return self.fields[key]
 